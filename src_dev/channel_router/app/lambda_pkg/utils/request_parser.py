@@ -7,6 +7,15 @@ import logging
 from typing import Dict, Any, Optional
 import base64 # Import base64
 
+try:
+    # orjson (app/requirements.txt) is used when installed and the stdlib json module
+    # otherwise, here and in response_builder. orjson's JSONDecodeError subclasses
+    # json.JSONDecodeError, so callers handle both the same way.
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger()
 
 def parse_request_body(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -21,44 +30,47 @@ def parse_request_body(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         A dictionary representing the parsed JSON body if successful,
         otherwise None if the body is missing, not a string, or invalid JSON.
     """
-    body_str = None # Initialize to None
-    try:
-        if 'body' not in event or event['body'] is None:
-            logger.warning("Request event is missing 'body'.")
-            return None
-
-        raw_body = event['body']
-        if not isinstance(raw_body, str):
-            logger.warning(f"Request body is not a string, type: {type(raw_body)}.")
-            return None
+    # Fast path: no body at all (e.g. warm-up pings) exits before any type checks
+    raw_body = event.get('body')
+    if raw_body is None:
+        logger.warning("Request event is missing 'body'.")
+        return None
+    if raw_body == '' or (type(raw_body) is str and not raw_body.strip()):
+        logger.warning("Request body is effectively empty.")
+        return None
 
-        # Check if body is Base64 encoded
-        if event.get('isBase64Encoded', False):
-            logger.debug("Request body is Base64 encoded. Decoding...")
-            try:
-                body_str = base64.b64decode(raw_body).decode('utf-8')
-            except (base64.binascii.Error, UnicodeDecodeError) as e:
-                logger.error(f"Failed to decode Base64 body: {e}")
-                return None
-        else:
-            body_str = raw_body # Use raw body if not encoded
+    # Exact type check: API Gateway always delivers a plain str (or None)
+    if type(raw_body) is not str:
+        logger.warning(f"Request body is not a string, type: {type(raw_body)}.")
+        return None
 
-        if not body_str or not body_str.strip(): # Handle empty string body (raw or decoded)
+    body_data = raw_body
+    # Check if body is Base64 encoded
+    if event.get('isBase64Encoded', False):
+        logger.debug("Request body is Base64 encoded. Decoding...")
+        try:
+            # Strict decode rejects non-alphabet characters instead of silently
+            # dropping them. The bytes go straight to the JSON loader (no UTF-8
+            # decode/copy); both orjson and json accept bytes input.
+            body_data = base64.b64decode(raw_body, validate=True)
+        except ValueError as e: # binascii.Error, or a plain ValueError for non-ASCII input
+            logger.error(f"Failed to decode Base64 body: {e}")
+            return None
+        if not body_data.strip(): # Handle a decoded body that is empty
             logger.warning("Request body is effectively empty.")
             return None
 
-        # Log the raw string before attempting to parse
-        logger.debug(f"Attempting to parse body string: {body_str}")
-        body = json.loads(body_str)
+    try:
+        # Log the raw body (str or decoded Base64 bytes) before attempting to parse
+        logger.debug(f"Attempting to parse body: {body_data}")
+        body = _json_loads(body_data)
         logger.debug("Successfully parsed request body.") # Use debug level for success
         return body
 
-    except json.JSONDecodeError as e:
-        # Add body_str to the error log if available for better debugging
-        log_body = body_str[:500] + '...' if body_str and len(body_str) > 500 else body_str
+    # ValueError covers JSONDecodeError (orjson's included), UnicodeDecodeError and the
+    # json fallback's int digit limit; RecursionError is deeply nested input with json.
+    except (ValueError, RecursionError) as e:
+        # Add body_data to the error log for better debugging
+        log_body = f"{body_data[:500]}..." if len(body_data) > 500 else body_data # f-string: body_data may be bytes
         logger.error(f"Failed to decode JSON body: {str(e)}. Body attempted: {log_body}") 
         return None
-    except Exception as e:
-        # Catch any other unexpected errors during parsing
-        logger.error(f"Unexpected error parsing request body: {str(e)}", exc_info=True)
-        return None
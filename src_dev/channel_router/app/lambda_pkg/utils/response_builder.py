@@ -2,15 +2,37 @@
 Response Builder Utility
 
 Provides helper functions to create standardized API Gateway Lambda Proxy responses.
+Headers, the status map and other lookup tables are module-level so they are built
+once per Lambda container, not once per response.
 """
 
 import json
 import logging
-from datetime import datetime, timezone
+import time
 from typing import Dict, Any, Optional
 
+try:
+    # Optional orjson backend (see request_parser). It returns UTF-8 bytes, which are
+    # decoded because API Gateway expects the body as a str.
+    import orjson
+
+    def _dumps(obj: Dict[str, Any]) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    _dumps = json.dumps
+
 logger = logging.getLogger()
 
+SUCCESS_MESSAGE = 'Request accepted and queued for processing'
+
+# Success bodies always have the same shape, so they are filled into a pre-encoded
+# template instead of going through the JSON encoder. Only request_id needs escaping.
+_SUCCESS_TMPL = (
+    '{"status":"success","request_id":%s,"message":'
+    + json.dumps(SUCCESS_MESSAGE)
+    + ',"queue_timestamp":"%s"}'
+)
+
 # Standard headers including CORS
 COMMON_HEADERS = {
     'Content-Type': 'application/json',
@@ -19,6 +41,53 @@ COMMON_HEADERS = {
     'Access-Control-Allow-Methods': 'OPTIONS,POST' # Adjust allowed methods as needed
 }
 
+# Response skeletons; each response is a shallow copy with only the varying keys set
+_SUCCESS_SKELETON = {'statusCode': 200, 'headers': COMMON_HEADERS, 'body': None}
+_ERROR_SKELETON = {'statusCode': None, 'headers': COMMON_HEADERS, 'body': None}
+
+# Error codes logged as security events when returned
+_SECURITY_ERROR_CODES = frozenset({'AUTHENTICATION_ERROR', 'AUTHORIZATION_ERROR', 'UNAUTHORIZED'})
+
+# Map internal error codes to HTTP status codes, built once at import
+_STATUS_MAP = {
+    'INVALID_REQUEST': 400,
+    'MISSING_IDENTIFIERS': 400,
+    'MISSING_COMPANY_DATA': 400,      # Kept from original for potential future use
+    'MISSING_RECIPIENT_DATA': 400,    # Kept from original
+    'MISSING_REQUEST_DATA': 400,      # Kept from original
+    'MISSING_COMPANY_FIELD': 400,     # Kept from original
+    'MISSING_REQUEST_ID': 400,        # Kept from original
+    'INVALID_REQUEST_ID': 400,        # Kept from original
+    'MISSING_CHANNEL_METHOD': 400,    # Kept from original
+    'UNSUPPORTED_CHANNEL': 400,       # Kept from original
+    'MISSING_INITIAL_REQUEST_TIMESTAMP': 400, # Kept from original
+    'INVALID_TIMESTAMP': 400,         # Kept from original
+    'TIMESTAMP_EXPIRED': 400,         # Kept from original
+    'MISSING_RECIPIENT_TEL': 400,     # Kept from original
+    'MISSING_RECIPIENT_EMAIL': 400,   # Kept from original
+    'PAYLOAD_TOO_LARGE': 400,         # Kept from original
+    'COMPANY_NOT_FOUND': 404,
+    'PROJECT_INACTIVE': 403,
+    'CHANNEL_NOT_ALLOWED': 403,
+    'UNAUTHORIZED': 401,              # Kept from original
+    'AUTHENTICATION_ERROR': 401,      # Kept from original
+    'AUTHORIZATION_ERROR': 403,       # Kept from original
+    'RATE_LIMIT_EXCEEDED': 429,
+    'DATABASE_ERROR': 500,
+    'QUEUE_ERROR': 500,
+    'CONFIGURATION_ERROR': 500,
+    'INTERNAL_ERROR': 500
+}
+
+def _iso_now() -> str:
+    """
+    Returns the current UTC time as YYYY-MM-DDTHH:MM:SS.ffffff+00:00, without
+    building datetime objects. Unlike datetime.isoformat(), the microseconds are
+    always included, even when they are zero.
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{nanos // 1000:06d}+00:00"
+
 def create_success_response(request_id: str) -> Dict[str, Any]:
     """
     Creates a standard success response (HTTP 200 OK).
@@ -29,19 +98,9 @@ def create_success_response(request_id: str) -> Dict[str, Any]:
     Returns:
         API Gateway Lambda Proxy Integration response dictionary.
     """
-    timestamp = datetime.now(timezone.utc).isoformat()
-    body = {
-        'status': 'success',
-        'request_id': request_id,
-        'message': 'Request accepted and queued for processing',
-        'queue_timestamp': timestamp
-    }
-    
-    return {
-        'statusCode': 200,
-        'headers': COMMON_HEADERS,
-        'body': json.dumps(body)
-    }
+    response = _SUCCESS_SKELETON.copy()
+    response['body'] = _SUCCESS_TMPL % (json.dumps(request_id), _iso_now())
+    return response
 
 def create_error_response(error_code: str, error_message: str, request_id: Optional[str] = None, status_code_hint: int = 500) -> Dict[str, Any]:
     """
@@ -56,40 +115,8 @@ def create_error_response(error_code: str, error_message: str, request_id: Optio
     Returns:
         API Gateway Lambda Proxy Integration response dictionary.
     """
-    # Map internal error codes to HTTP status codes
-    # Consistent with original build and common practices
-    status_code_mapping = {
-        'INVALID_REQUEST': 400,
-        'MISSING_IDENTIFIERS': 400,
-        'MISSING_COMPANY_DATA': 400,      # Kept from original for potential future use
-        'MISSING_RECIPIENT_DATA': 400,    # Kept from original
-        'MISSING_REQUEST_DATA': 400,      # Kept from original
-        'MISSING_COMPANY_FIELD': 400,     # Kept from original
-        'MISSING_REQUEST_ID': 400,        # Kept from original
-        'INVALID_REQUEST_ID': 400,        # Kept from original
-        'MISSING_CHANNEL_METHOD': 400,    # Kept from original
-        'UNSUPPORTED_CHANNEL': 400,       # Kept from original
-        'MISSING_INITIAL_REQUEST_TIMESTAMP': 400, # Kept from original
-        'INVALID_TIMESTAMP': 400,         # Kept from original
-        'TIMESTAMP_EXPIRED': 400,         # Kept from original
-        'MISSING_RECIPIENT_TEL': 400,     # Kept from original
-        'MISSING_RECIPIENT_EMAIL': 400,   # Kept from original
-        'PAYLOAD_TOO_LARGE': 400,         # Kept from original
-        'COMPANY_NOT_FOUND': 404,
-        'PROJECT_INACTIVE': 403,
-        'CHANNEL_NOT_ALLOWED': 403,
-        'UNAUTHORIZED': 401,              # Kept from original
-        'AUTHENTICATION_ERROR': 401,      # Kept from original
-        'AUTHORIZATION_ERROR': 403,       # Kept from original
-        'RATE_LIMIT_EXCEEDED': 429,
-        'DATABASE_ERROR': 500,
-        'QUEUE_ERROR': 500,
-        'CONFIGURATION_ERROR': 500,
-        'INTERNAL_ERROR': 500
-    }
-
     # Determine the status code
-    status_code = status_code_mapping.get(error_code, status_code_hint)
+    status_code = _STATUS_MAP.get(error_code, status_code_hint)
     
     # Use 'unknown' if request_id wasn't determined before the error
     request_id_to_use = request_id if request_id else 'unknown'
@@ -102,13 +129,12 @@ def create_error_response(error_code: str, error_message: str, request_id: Optio
     }
     
     # Log specific error types if needed (optional, mirroring original)
-    if error_code in ('AUTHENTICATION_ERROR', 'AUTHORIZATION_ERROR', 'UNAUTHORIZED'):
+    if error_code in _SECURITY_ERROR_CODES:
         logger.warning(f"Security error response generated: {error_code} - {error_message} (Request ID: {request_id_to_use})")
     elif status_code >= 500:
          logger.error(f"Server error response generated: {error_code} - {error_message} (Request ID: {request_id_to_use})")
 
-    return {
-        'statusCode': status_code,
-        'headers': COMMON_HEADERS,
-        'body': json.dumps(body)
-    }
+    response = _ERROR_SKELETON.copy()
+    response['statusCode'] = status_code
+    response['body'] = _dumps(body)
+    return response
@@ -1,25 +1,47 @@
+import collections
 import pytest
-import os
 import json
-import time
-from unittest.mock import patch, MagicMock, ANY
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, ANY
 
 # Module to test (main handler)
-# Import the handler function directly, assuming src_dev is the package root
-# from src_dev.channel_processor.whatsapp.app.index import lambda_handler
-from channel_processor.whatsapp.app.lambda_pkg.index import lambda_handler
+# The handler is imported lazily by the `lambda_handler` fixture below so that collecting this
+# module doesn't pull in boto3 and the service modules (every dependency is injected as a mock).
 
 # --- Constants ---
 DUMMY_TABLE_NAME = "test-conversations-table"
 DUMMY_QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/123456789012/test-queue"
 DUMMY_REGION = "eu-north-1"
 DUMMY_HEARTBEAT_MS = "30000"
+DUMMY_QUEUE_NAME = DUMMY_QUEUE_URL.rsplit('/', 1)[-1]
+DUMMY_EVENT_SOURCE_ARN = f"arn:aws:sqs:{DUMMY_REGION}:123456789012:{DUMMY_QUEUE_NAME}"
+# Fixed SQS timestamp; the handler never inspects it, so no need to read the clock per event
+_FIXED_TS = "1700000000000"
+
+# Static part of an SQS record, built once; create_sqs_event only fills in the per-message keys
+_RECORD_TEMPLATE = {
+    "attributes": {
+        "ApproximateReceiveCount": "1",
+        "SentTimestamp": _FIXED_TS,
+        "SenderId": "123456789012",
+        "ApproximateFirstReceiveTimestamp": _FIXED_TS
+    },
+    "messageAttributes": {},
+    "md5OfBody": "dummy", # Calculate properly if needed
+    "eventSource": "aws:sqs",
+    "eventSourceARN": DUMMY_EVENT_SOURCE_ARN,
+    "awsRegion": DUMMY_REGION
+}
 
 # --- Fixtures ---
 
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="module", autouse=True)
 def set_environment_variables():
-    """Set required environment variables for the handler using patch.dict."""
+    """Set required environment variables for the handler while this module's tests run.
+
+    MonkeyPatch only records the keys it sets and restores them when the module finishes,
+    so later test modules never see these values.
+    """
     env_vars = {
         "CONVERSATIONS_TABLE": DUMMY_TABLE_NAME,
         "WHATSAPP_QUEUE_URL": DUMMY_QUEUE_URL,
@@ -28,270 +50,136 @@ def set_environment_variables():
         "VERSION": "test-processor-0.1",
         "LOG_LEVEL": "DEBUG"
     }
-    # Use patch.dict to temporarily modify os.environ
-    with patch.dict(os.environ, env_vars, clear=True) as patched_env:
-        yield patched_env # Yield the patched dictionary if needed, otherwise just yield
-    # Environment is automatically restored after the with block
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in env_vars.items():
+            mp.setenv(key, value)
+        yield
+
+@pytest.fixture(scope="session")
+def lambda_handler():
+    """Imports the handler under test on first use."""
+    from channel_processor.whatsapp.app.lambda_pkg.index import lambda_handler as handler
+    return handler
 
 # --- Mocks for Injected Dependencies ---
 
+# Default service results returned by the mocks
+_AI_RESULT = {
+    "content_variables": {"1": "Mock Name", "2": "Mock Offer"},
+    "thread_id": "th_mockopenai123",
+    "prompt_tokens": 50,
+    "completion_tokens": 25,
+    "total_tokens": 75
+}
+_TWILIO_RESULT = {
+    "message_sid": "SMmocktwilio123",
+    "body": "Mock rendered message."
+}
+
+def _sm_get_secret(secret_ref):
+    if "openai" in secret_ref:
+        return {"ai_api_key": "sk-dummykey"}
+    elif "channel" in secret_ref:
+        return {"twilio_account_sid": "ACdummy", "twilio_auth_token": "authdummy", "twilio_template_sid": "HXdummy"}
+    return None
+
+@pytest.fixture(scope="session")
+def _shared_mocks():
+    """Mock objects built once per session; the fixtures below reset them before each test."""
+    hb_instance = Mock(spec=["start", "stop", "running", "check_for_errors"])
+    return SimpleNamespace(
+        ctx=MagicMock(), hb_inst=hb_instance, hb_class=Mock(return_value=hb_instance),
+        db=MagicMock(), sm=MagicMock(), ai=MagicMock(), msg=MagicMock()
+    )
+
 @pytest.fixture
-def mock_ctx_utils():
+def mock_ctx_utils(_shared_mocks):
     """Provides a mock context_utils module."""
-    mock = MagicMock()
-    mock.deserialize_context.return_value = {"key": "value"} # Default
-    mock.validate_context.return_value = [] # Default (no errors)
-    return mock
+    ctx_utils = _shared_mocks.ctx
+    ctx_utils.reset_mock(return_value=True, side_effect=True)
+    ctx_utils.deserialize_context.return_value = {"key": "value"} # Default
+    ctx_utils.validate_context.return_value = [] # Default (no errors)
+    return ctx_utils
 
 @pytest.fixture
-def mock_heartbeat_class():
+def mock_heartbeat_class(_shared_mocks):
     """Provides a mock SQSHeartbeat class and its instance."""
-    mock_instance = MagicMock()
-    mock_instance.running = True
-    mock_instance.check_for_errors.return_value = None
-    mock_class = MagicMock(return_value=mock_instance)
-    return mock_class, mock_instance # Return both for easier assertions
+    hb_class, hb_instance = _shared_mocks.hb_class, _shared_mocks.hb_inst
+    hb_class.reset_mock()
+    hb_instance.reset_mock(return_value=True, side_effect=True)
+    hb_instance.running = True
+    hb_instance.check_for_errors.return_value = None
+    return hb_class, hb_instance # Return both for easier assertions
 
 @pytest.fixture
-def mock_db_service():
+def mock_db_service(_shared_mocks):
     """Provides a mock dynamodb_service module."""
-    mock = MagicMock()
-    mock.create_initial_conversation_record.return_value = True # Default success
-    mock.update_conversation_after_send.return_value = True # Default success
-    return mock
+    db_service = _shared_mocks.db
+    db_service.reset_mock(return_value=True, side_effect=True)
+    db_service.create_initial_conversation_record.return_value = True # Default success
+    db_service.update_conversation_after_send.return_value = True # Default success
+    return db_service
 
 @pytest.fixture
-def mock_sm_service():
+def mock_sm_service(_shared_mocks):
     """Provides a mock secrets_manager_service module."""
-    mock = MagicMock()
-    def side_effect(secret_ref):
-        if "openai" in secret_ref:
-            return {"ai_api_key": "sk-dummykey"}
-        elif "channel" in secret_ref:
-            return {"twilio_account_sid": "ACdummy", "twilio_auth_token": "authdummy", "twilio_template_sid": "HXdummy"}
-        return None
-    mock.get_secret.side_effect = side_effect
-    return mock
+    sm_service = _shared_mocks.sm
+    sm_service.reset_mock(return_value=True, side_effect=True)
+    sm_service.get_secret.side_effect = _sm_get_secret
+    return sm_service
 
 @pytest.fixture
-def mock_ai_service():
+def mock_ai_service(_shared_mocks):
     """Provides a mock openai_service module."""
-    mock = MagicMock()
-    mock.process_message_with_ai.return_value = {
-        "content_variables": {"1": "Mock Name", "2": "Mock Offer"},
-        "thread_id": "th_mockopenai123",
-        "prompt_tokens": 50,
-        "completion_tokens": 25,
-        "total_tokens": 75
-    }
-    return mock
+    ai_service = _shared_mocks.ai
+    ai_service.reset_mock(return_value=True, side_effect=True)
+    ai_service.process_message_with_ai.return_value = _AI_RESULT
+    return ai_service
 
 @pytest.fixture
-def mock_msg_service():
+def mock_msg_service(_shared_mocks):
     """Provides a mock twilio_service module."""
-    mock = MagicMock()
-    mock.send_whatsapp_template_message.return_value = {
-        "message_sid": "SMmocktwilio123",
-        "body": "Mock rendered message."
-    }
-    return mock
+    msg_service = _shared_mocks.msg
+    msg_service.reset_mock(return_value=True, side_effect=True)
+    msg_service.send_whatsapp_template_message.return_value = _TWILIO_RESULT
+    return msg_service
 
-@pytest.fixture
-def mock_logger():
-    """Provides a mock logger."""
-    return MagicMock()
+class FakeLogger:
+    """Minimal logger stand-in that records calls per level in `calls`."""
 
-# --- Helper to create SQS Event ---
+    def __init__(self):
+        self.calls = collections.defaultdict(list)
 
-def create_sqs_event(message_body, message_id="msg1", receipt_handle="handle1"):
-    """Helper to create a consistent SQS event structure."""
-    # Ensure body is always a JSON string
-    if isinstance(message_body, dict):
-        body_str = json.dumps(message_body)
-    else:
-        body_str = str(message_body) # Ensure it's a string
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls[name].append((args, kwargs))
 
-    return {
-        "Records": [
-            {
-                "messageId": message_id,
-                "receiptHandle": receipt_handle,
-                "body": body_str,
-                "attributes": {
-                    "ApproximateReceiveCount": "1",
-                    "SentTimestamp": str(int(time.time() * 1000)),
-                    "SenderId": "123456789012",
-                    "ApproximateFirstReceiveTimestamp": str(int(time.time() * 1000))
-                },
-                "messageAttributes": {},
-                "md5OfBody": "dummy", # Calculate properly if needed
-                "eventSource": "aws:sqs",
-                "eventSourceARN": f"arn:aws:sqs:{DUMMY_REGION}:123456789012:{DUMMY_QUEUE_URL.split('/')[-1]}",
-                "awsRegion": DUMMY_REGION
-            }
-        ]
-    }
+    def assert_called_once(self, name):
+        assert len(self.calls[name]) == 1, f"Expected one {name} call, got {len(self.calls[name])}"
 
-# --- Test Cases for lambda_handler ---
+    def assert_not_called(self, name):
+        assert not self.calls[name], f"Expected no {name} calls, got {self.calls[name]}"
 
-def test_lambda_handler_success_path(
-    mock_ctx_utils, mock_heartbeat_class, mock_db_service,
-    mock_sm_service, mock_ai_service, mock_msg_service, mock_logger
-):
-    """Test the main success path through the handler using injected mocks."""
-    # Setup: Provide a valid context object
-    valid_context = {
-        'metadata': {},
-        'frontend_payload': {
-            'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'},
-            'recipient_data': {'recipient_tel': '+123'},
-            'project_data': {}
-        },
-        'conversation_data': {'conversation_id': 'conv_1'},
-        'company_data_payload': {
-            'channel_config': {'whatsapp': {'whatsapp_credentials_id': 'channel_secret_ref', 'company_whatsapp_number': '+456'}},
-            'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_secret_ref', 'assistant_id_template_sender': 'asst_1'}}}
-        }
-    }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_hb_class, mock_hb_instance = mock_heartbeat_class
-
-    # Create event
-    event = create_sqs_event(valid_context)
-
-    # Execute with injected mocks
-    response = lambda_handler(
-        event, None,
-        ctx_utils=mock_ctx_utils,
-        HeartbeatClass=mock_hb_class,
-        db_service=mock_db_service,
-        sm_service=mock_sm_service,
-        ai_service=mock_ai_service,
-        msg_service=mock_msg_service,
-        log=mock_logger
-    )
-
-    # Assertions
-    assert response == {"batchItemFailures": []}
-
-    # Check mocks were called correctly
-    mock_ctx_utils.deserialize_context.assert_called_once_with(json.dumps(valid_context))
-    mock_ctx_utils.validate_context.assert_called_once_with(valid_context)
-    mock_hb_class.assert_called_once_with(
-        queue_url=DUMMY_QUEUE_URL,
-        receipt_handle='handle1',
-        interval_sec=int(int(DUMMY_HEARTBEAT_MS) / 1000)
-    )
-    mock_hb_instance.start.assert_called_once()
-    mock_db_service.create_initial_conversation_record.assert_called_once_with(context_object=valid_context, ddb_table=ANY)
-    assert mock_sm_service.get_secret.call_count == 2
-    mock_sm_service.get_secret.assert_any_call('openai_secret_ref')
-    mock_sm_service.get_secret.assert_any_call('channel_secret_ref')
-    mock_ai_service.process_message_with_ai.assert_called_once()
-    openai_call_args, openai_call_kwargs = mock_ai_service.process_message_with_ai.call_args
-    assert openai_call_args[0]['conversation_id'] == 'conv_1'
-    assert openai_call_args[0]['assistant_id'] == 'asst_1'
-    assert openai_call_args[1] == {"ai_api_key": "sk-dummykey"}
-    mock_msg_service.send_whatsapp_template_message.assert_called_once()
-    twilio_call_args, twilio_call_kwargs = mock_msg_service.send_whatsapp_template_message.call_args
-    assert twilio_call_kwargs['twilio_config'] == {"twilio_account_sid": "ACdummy", "twilio_auth_token": "authdummy", "twilio_template_sid": "HXdummy"}
-    assert twilio_call_kwargs['recipient_tel'] == '+123'
-    assert twilio_call_kwargs['twilio_sender_number'] == '+456'
-    assert twilio_call_kwargs['content_variables'] == {"1": "Mock Name", "2": "Mock Offer"}
-    mock_db_service.update_conversation_after_send.assert_called_once()
-    db_update_args, db_update_kwargs = mock_db_service.update_conversation_after_send.call_args
-    assert db_update_kwargs['primary_channel_pk'] == '+123'
-    assert db_update_kwargs['conversation_id_sk'] == 'conv_1'
-    assert db_update_kwargs['thread_id'] == 'th_mockopenai123'
-    assert db_update_kwargs['message_to_append']['message_id'] == 'SMmocktwilio123'
-
-    mock_hb_instance.stop.assert_called_once()
-    mock_logger.error.assert_not_called()
-    mock_logger.critical.assert_not_called()
-
-def test_lambda_handler_deserialize_fails(mock_ctx_utils, mock_logger):
-    """Test failure when context deserialization fails."""
-    mock_ctx_utils.deserialize_context.side_effect = ValueError("Bad JSON")
-    # Fix: Pass a simple invalid string, or correctly formatted JSON string if testing valid JSON
-    # For testing deserialize failure, pass a string that is NOT valid JSON
-    # event = create_sqs_event("{\\\"malformed\\\": \"json\\\"}") # Pass raw string
-    event = create_sqs_event("{'malformed': True}") # Use single quotes, or ensure it's invalid JSON
-
-    response = lambda_handler(event, None, ctx_utils=mock_ctx_utils, log=mock_logger)
-
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    mock_ctx_utils.validate_context.assert_not_called()
-    mock_logger.exception.assert_called_once()
-
-def test_lambda_handler_validate_fails(mock_ctx_utils, mock_logger):
-    """Test failure when context validation fails."""
-    mock_ctx_utils.deserialize_context.return_value = {'metadata': {}, "key": "value"}
-    mock_ctx_utils.validate_context.return_value = ["Missing field X"]
-    event = create_sqs_event({"key": "value"})
-
-    response = lambda_handler(event, None, ctx_utils=mock_ctx_utils, log=mock_logger)
-
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    mock_ctx_utils.deserialize_context.assert_called_once()
-    mock_logger.exception.assert_called_once()
-
-def test_lambda_handler_dynamodb_create_fails(mock_ctx_utils, mock_db_service, mock_logger):
-    """Test failure when initial DynamoDB record creation fails."""
-    valid_context = {
-        'metadata': {},
-        'frontend_payload': {'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'}, 'recipient_data': {}},
-        'conversation_data': {'conversation_id': 'conv_1'},
-        'company_data_payload': {'channel_config': {}, 'ai_config': {}}
-    }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_db_service.create_initial_conversation_record.return_value = False # Simulate failure
-    event = create_sqs_event(valid_context)
-
-    response = lambda_handler(event, None, ctx_utils=mock_ctx_utils, db_service=mock_db_service, log=mock_logger)
-
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    mock_db_service.update_conversation_after_send.assert_not_called()
-    mock_logger.exception.assert_called_once()
+@pytest.fixture
+def mock_logger():
+    """Provides a fake logger."""
+    return FakeLogger()
 
-def test_lambda_handler_secrets_fetch_fails(
+@pytest.fixture
+def handler_deps(
     mock_ctx_utils, mock_heartbeat_class, mock_db_service,
-    mock_sm_service, mock_logger
+    mock_sm_service, mock_ai_service, mock_msg_service, mock_logger
 ):
-    """Test failure when fetching secrets fails."""
-    valid_context = {
-        'metadata': {},
-        'frontend_payload': {'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'}, 'recipient_data': {}},
-        'conversation_data': {'conversation_id': 'conv_1'},
-        'company_data_payload': {
-            'channel_config': {'whatsapp': {'whatsapp_credentials_id': 'channel_ref'}},
-            'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_ref'}}}
-        }
-    }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_sm_service.get_secret.side_effect = ValueError("Secrets Error") # Simulate failure
-    mock_hb_class, _ = mock_heartbeat_class # Unpack mock class
-    event = create_sqs_event(valid_context)
-
-    response = lambda_handler(
-        event, None,
-        ctx_utils=mock_ctx_utils,
-        HeartbeatClass=mock_hb_class,
-        db_service=mock_db_service,
-        sm_service=mock_sm_service,
-        log=mock_logger
+    """Bundles the injected handler dependencies so tests request a single fixture."""
+    hb_class, hb_inst = mock_heartbeat_class
+    return SimpleNamespace(
+        ctx=mock_ctx_utils, hb_class=hb_class, hb_inst=hb_inst, db=mock_db_service,
+        sm=mock_sm_service, ai=mock_ai_service, msg=mock_msg_service, log=mock_logger
     )
 
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    # mock_logger.exception.assert_called_once()
-    # Check that *an* exception was logged, not necessarily just one
-    assert mock_logger.exception.call_count > 0
-
-def test_lambda_handler_openai_fails(
-    mock_ctx_utils, mock_heartbeat_class, mock_db_service,
-    mock_sm_service, mock_ai_service, mock_logger
-):
-    """Test failure during OpenAI processing."""
-    valid_context = {
+@pytest.fixture(scope="class")
+def valid_context():
+    """Context object shared by each test class; the handler only reads it."""
+    return {
         'metadata': {},
         'frontend_payload': {
             'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'},
@@ -304,107 +192,192 @@ def test_lambda_handler_openai_fails(
             'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_secret_ref', 'assistant_id_template_sender': 'asst_1'}}}
         }
     }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_ai_service.process_message_with_ai.return_value = None # Simulate OpenAI failure
-    mock_hb_class, _ = mock_heartbeat_class # Unpack mock class
-    event = create_sqs_event(valid_context)
-
-    response = lambda_handler(
-        event, None,
-        ctx_utils=mock_ctx_utils,
-        HeartbeatClass=mock_hb_class,
-        db_service=mock_db_service,
-        sm_service=mock_sm_service,
-        ai_service=mock_ai_service,
-        log=mock_logger
-    )
 
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    mock_logger.exception.assert_called_once()
+# --- Helper to create SQS Event ---
 
-def test_lambda_handler_twilio_fails(
-    mock_ctx_utils, mock_heartbeat_class, mock_db_service,
-    mock_sm_service, mock_ai_service, mock_msg_service, mock_logger
-):
-    """Test failure during Twilio send."""
-    valid_context = {
-        'metadata': {},
-        'frontend_payload': {
-            'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'},
-            'recipient_data': {'recipient_tel': '+123'},
-            'project_data': {}
-        },
-        'conversation_data': {'conversation_id': 'conv_1'},
-        'company_data_payload': {
-            'channel_config': {'whatsapp': {'whatsapp_credentials_id': 'channel_secret_ref', 'company_whatsapp_number': '+456'}},
-            'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_secret_ref', 'assistant_id_template_sender': 'asst_1'}}}
-        }
+def create_sqs_event(message_body, message_id="msg1", receipt_handle="handle1"):
+    """Helper to create a consistent SQS event structure."""
+    # Ensure body is always a JSON string
+    if isinstance(message_body, dict):
+        body_str = json.dumps(message_body)
+    else:
+        body_str = str(message_body) # Ensure it's a string
+
+    return {
+        "Records": [
+            {**_RECORD_TEMPLATE, "body": body_str, "messageId": message_id, "receiptHandle": receipt_handle}
+        ]
     }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_msg_service.send_whatsapp_template_message.return_value = None # Simulate Twilio failure
-    mock_hb_class, _ = mock_heartbeat_class # Unpack mock class
-    event = create_sqs_event(valid_context)
-
-    response = lambda_handler(
-        event, None,
-        ctx_utils=mock_ctx_utils,
-        HeartbeatClass=mock_hb_class,
-        db_service=mock_db_service,
-        sm_service=mock_sm_service,
-        ai_service=mock_ai_service,
-        msg_service=mock_msg_service,
-        log=mock_logger
-    )
 
-    assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
-    mock_db_service.update_conversation_after_send.assert_not_called()
-    mock_logger.exception.assert_called_once()
+# --- Test Cases for lambda_handler ---
 
-def test_lambda_handler_final_db_update_fails(
-    mock_ctx_utils, mock_heartbeat_class, mock_db_service,
-    mock_sm_service, mock_ai_service, mock_msg_service, mock_logger
-):
-    """Test that failure during final DB update logs critically but doesn't fail SQS message."""
-    valid_context = {
-        'metadata': {},
-        'frontend_payload': {
-            'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'},
-            'recipient_data': {'recipient_tel': '+123'},
-            'project_data': {}
-        },
-        'conversation_data': {'conversation_id': 'conv_1'},
-        'company_data_payload': {
-            'channel_config': {'whatsapp': {'whatsapp_credentials_id': 'channel_secret_ref', 'company_whatsapp_number': '+456'}},
-            'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_secret_ref', 'assistant_id_template_sender': 'asst_1'}}}
+class TestLambdaHandler:
+    """Tests for the processor lambda_handler, driven through injected mocks."""
+
+    @staticmethod
+    def invoke(lambda_handler, handler_deps, event):
+        """Runs the handler with every dependency injected from handler_deps."""
+        return lambda_handler(
+            event, None,
+            ctx_utils=handler_deps.ctx,
+            HeartbeatClass=handler_deps.hb_class,
+            db_service=handler_deps.db,
+            sm_service=handler_deps.sm,
+            ai_service=handler_deps.ai,
+            msg_service=handler_deps.msg,
+            log=handler_deps.log
+        )
+
+    def test_lambda_handler_success_path(self, lambda_handler, handler_deps, valid_context):
+        """Test the main success path through the handler using injected mocks."""
+        handler_deps.ctx.deserialize_context.return_value = valid_context
+        event = create_sqs_event(valid_context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        # Assertions
+        assert response == {"batchItemFailures": []}
+
+        # Check mocks were called correctly
+        handler_deps.ctx.deserialize_context.assert_called_once_with(json.dumps(valid_context))
+        handler_deps.ctx.validate_context.assert_called_once_with(valid_context)
+        handler_deps.hb_class.assert_called_once_with(
+            queue_url=DUMMY_QUEUE_URL,
+            receipt_handle='handle1',
+            interval_sec=int(int(DUMMY_HEARTBEAT_MS) / 1000)
+        )
+        handler_deps.hb_inst.start.assert_called_once()
+        handler_deps.db.create_initial_conversation_record.assert_called_once_with(context_object=valid_context, ddb_table=ANY)
+        assert handler_deps.sm.get_secret.call_count == 2
+        handler_deps.sm.get_secret.assert_any_call('openai_secret_ref')
+        handler_deps.sm.get_secret.assert_any_call('channel_secret_ref')
+        handler_deps.ai.process_message_with_ai.assert_called_once()
+        openai_call_args, openai_call_kwargs = handler_deps.ai.process_message_with_ai.call_args
+        assert openai_call_args[0]['conversation_id'] == 'conv_1'
+        assert openai_call_args[0]['assistant_id'] == 'asst_1'
+        assert openai_call_args[1] == {"ai_api_key": "sk-dummykey"}
+        handler_deps.msg.send_whatsapp_template_message.assert_called_once()
+        twilio_call_args, twilio_call_kwargs = handler_deps.msg.send_whatsapp_template_message.call_args
+        assert twilio_call_kwargs['twilio_config'] == {"twilio_account_sid": "ACdummy", "twilio_auth_token": "authdummy", "twilio_template_sid": "HXdummy"}
+        assert twilio_call_kwargs['recipient_tel'] == '+123'
+        assert twilio_call_kwargs['twilio_sender_number'] == '+456'
+        assert twilio_call_kwargs['content_variables'] == {"1": "Mock Name", "2": "Mock Offer"}
+        handler_deps.db.update_conversation_after_send.assert_called_once()
+        db_update_args, db_update_kwargs = handler_deps.db.update_conversation_after_send.call_args
+        assert db_update_kwargs['primary_channel_pk'] == '+123'
+        assert db_update_kwargs['conversation_id_sk'] == 'conv_1'
+        assert db_update_kwargs['thread_id'] == 'th_mockopenai123'
+        assert db_update_kwargs['message_to_append']['message_id'] == 'SMmocktwilio123'
+
+        handler_deps.hb_inst.stop.assert_called_once()
+        handler_deps.log.assert_not_called("error")
+        handler_deps.log.assert_not_called("critical")
+
+    def test_lambda_handler_deserialize_fails(self, lambda_handler, handler_deps):
+        """Test failure when context deserialization fails."""
+        handler_deps.ctx.deserialize_context.side_effect = ValueError("Bad JSON")
+        # For testing deserialize failure, pass a string that is NOT valid JSON
+        event = create_sqs_event("{'malformed': True}") # Use single quotes, or ensure it's invalid JSON
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        handler_deps.ctx.validate_context.assert_not_called()
+        handler_deps.log.assert_called_once("exception")
+
+    def test_lambda_handler_validate_fails(self, lambda_handler, handler_deps):
+        """Test failure when context validation fails."""
+        handler_deps.ctx.deserialize_context.return_value = {'metadata': {}, "key": "value"}
+        handler_deps.ctx.validate_context.return_value = ["Missing field X"]
+        event = create_sqs_event({"key": "value"})
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        handler_deps.ctx.deserialize_context.assert_called_once()
+        handler_deps.log.assert_called_once("exception")
+
+    def test_lambda_handler_dynamodb_create_fails(self, lambda_handler, handler_deps):
+        """Test failure when initial DynamoDB record creation fails."""
+        context = {
+            'metadata': {},
+            'frontend_payload': {'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'}, 'recipient_data': {}},
+            'conversation_data': {'conversation_id': 'conv_1'},
+            'company_data_payload': {'channel_config': {}, 'ai_config': {}}
         }
-    }
-    mock_ctx_utils.deserialize_context.return_value = valid_context
-    mock_db_service.update_conversation_after_send.return_value = False # Simulate final update failure
-    mock_hb_class, mock_hb_instance = mock_heartbeat_class
-    event = create_sqs_event(valid_context)
-
-    response = lambda_handler(
-        event, None,
-        ctx_utils=mock_ctx_utils,
-        HeartbeatClass=mock_hb_class,
-        db_service=mock_db_service,
-        sm_service=mock_sm_service,
-        ai_service=mock_ai_service,
-        msg_service=mock_msg_service,
-        log=mock_logger
-    )
-
-    assert response == {"batchItemFailures": []}
-    mock_logger.critical.assert_called_once()
-    log_args, log_kwargs = mock_logger.critical.call_args
-    assert "CRITICAL:" in log_args[0]
-    assert "final DynamoDB update failed" in log_args[0]
-    assert "Manual intervention required" in log_args[0]
-    assert "conv_1" in log_args[0]
-    assert "SMmocktwilio123" in log_args[0]
-
-    mock_db_service.create_initial_conversation_record.assert_called_once()
-    mock_ai_service.process_message_with_ai.assert_called_once()
-    mock_msg_service.send_whatsapp_template_message.assert_called_once()
-    mock_db_service.update_conversation_after_send.assert_called_once()
-    mock_hb_instance.stop.assert_called_once()
\ No newline at end of file
+        handler_deps.ctx.deserialize_context.return_value = context
+        handler_deps.db.create_initial_conversation_record.return_value = False # Simulate failure
+        event = create_sqs_event(context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        handler_deps.db.update_conversation_after_send.assert_not_called()
+        handler_deps.log.assert_called_once("exception")
+
+    def test_lambda_handler_secrets_fetch_fails(self, lambda_handler, handler_deps):
+        """Test failure when fetching secrets fails."""
+        context = {
+            'metadata': {},
+            'frontend_payload': {'request_data': {'request_id': 'req_1', 'channel_method': 'whatsapp'}, 'recipient_data': {}},
+            'conversation_data': {'conversation_id': 'conv_1'},
+            'company_data_payload': {
+                'channel_config': {'whatsapp': {'whatsapp_credentials_id': 'channel_ref'}},
+                'ai_config': {'openai_config': {'whatsapp': {'api_key_reference': 'openai_ref'}}}
+            }
+        }
+        handler_deps.ctx.deserialize_context.return_value = context
+        handler_deps.sm.get_secret.side_effect = ValueError("Secrets Error") # Simulate failure
+        event = create_sqs_event(context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        # Check that *an* exception was logged, not necessarily just one
+        assert len(handler_deps.log.calls["exception"]) > 0
+
+    def test_lambda_handler_openai_fails(self, lambda_handler, handler_deps, valid_context):
+        """Test failure during OpenAI processing."""
+        handler_deps.ctx.deserialize_context.return_value = valid_context
+        handler_deps.ai.process_message_with_ai.return_value = None # Simulate OpenAI failure
+        event = create_sqs_event(valid_context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        handler_deps.log.assert_called_once("exception")
+
+    def test_lambda_handler_twilio_fails(self, lambda_handler, handler_deps, valid_context):
+        """Test failure during Twilio send."""
+        handler_deps.ctx.deserialize_context.return_value = valid_context
+        handler_deps.msg.send_whatsapp_template_message.return_value = None # Simulate Twilio failure
+        event = create_sqs_event(valid_context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg1"}]
+        handler_deps.db.update_conversation_after_send.assert_not_called()
+        handler_deps.log.assert_called_once("exception")
+
+    def test_lambda_handler_final_db_update_fails(self, lambda_handler, handler_deps, valid_context):
+        """Test that failure during final DB update logs critically but doesn't fail SQS message."""
+        handler_deps.ctx.deserialize_context.return_value = valid_context
+        handler_deps.db.update_conversation_after_send.return_value = False # Simulate final update failure
+        event = create_sqs_event(valid_context)
+
+        response = self.invoke(lambda_handler, handler_deps, event)
+
+        assert response == {"batchItemFailures": []}
+        handler_deps.log.assert_called_once("critical")
+        log_args, log_kwargs = handler_deps.log.calls["critical"][-1]
+        assert "CRITICAL:" in log_args[0]
+        assert "final DynamoDB update failed" in log_args[0]
+        assert "Manual intervention required" in log_args[0]
+        assert "conv_1" in log_args[0]
+        assert "SMmocktwilio123" in log_args[0]
+
+        handler_deps.db.create_initial_conversation_record.assert_called_once()
+        handler_deps.ai.process_message_with_ai.assert_called_once()
+        handler_deps.msg.send_whatsapp_template_message.assert_called_once()
+        handler_deps.db.update_conversation_after_send.assert_called_once()
+        handler_deps.hb_inst.stop.assert_called_once()
@@ -1,3 +1,4 @@
+import copy
 import pytest
 import json
 from src_dev.channel_processor.whatsapp.app.lambda_pkg.utils.context_utils import (
@@ -89,36 +90,33 @@ def test_validate_context_top_level_key_not_dict():
     errors = validate_context(context)
     assert any("Top-level key 'company_data_payload' is not a dictionary" in e for e in errors)
 
-def test_validate_context_missing_nested_keys():
-    """Test validation fails for various missing required nested keys."""
-    required_paths_and_errors = {
-        ("frontend_payload", "company_data", "company_id"): "Missing 'frontend_payload.company_data.company_id'",
-        ("frontend_payload", "company_data", "project_id"): "Missing 'frontend_payload.company_data.project_id'",
-        ("frontend_payload", "recipient_data", "recipient_tel"): "Missing 'frontend_payload.recipient_data.recipient_tel'",
-        ("frontend_payload", "request_data", "request_id"): "Missing 'frontend_payload.request_data.request_id'",
-        ("company_data_payload", "channel_config", "whatsapp", "whatsapp_credentials_id"): "Missing 'company_data_payload.channel_config.whatsapp.whatsapp_credentials_id'",
-        ("company_data_payload", "channel_config", "whatsapp", "company_whatsapp_number"): "Missing 'company_data_payload.channel_config.whatsapp.company_whatsapp_number'",
-        ("company_data_payload", "ai_config", "openai_config", "whatsapp", "api_key_reference"): "Missing 'company_data_payload.ai_config.openai_config.whatsapp.api_key_reference'",
-        ("company_data_payload", "ai_config", "openai_config", "whatsapp", "assistant_id_template_sender"): "Missing 'company_data_payload.ai_config.openai_config.whatsapp.assistant_id_template_sender'",
-        ("conversation_data", "conversation_id"): "Missing 'conversation_data.conversation_id'",
-    }
+@pytest.fixture(scope="session")
+def valid_context_template():
+    """Session-wide valid context; tests must deepcopy before mutating."""
+    return create_valid_context()
+
+@pytest.mark.parametrize("path_keys,expected_error", [
+    (("frontend_payload", "company_data", "company_id"), "Missing 'frontend_payload.company_data.company_id'"),
+    (("frontend_payload", "company_data", "project_id"), "Missing 'frontend_payload.company_data.project_id'"),
+    (("frontend_payload", "recipient_data", "recipient_tel"), "Missing 'frontend_payload.recipient_data.recipient_tel'"),
+    (("frontend_payload", "request_data", "request_id"), "Missing 'frontend_payload.request_data.request_id'"),
+    (("company_data_payload", "channel_config", "whatsapp", "whatsapp_credentials_id"), "Missing 'company_data_payload.channel_config.whatsapp.whatsapp_credentials_id'"),
+    (("company_data_payload", "channel_config", "whatsapp", "company_whatsapp_number"), "Missing 'company_data_payload.channel_config.whatsapp.company_whatsapp_number'"),
+    (("company_data_payload", "ai_config", "openai_config", "whatsapp", "api_key_reference"), "Missing 'company_data_payload.ai_config.openai_config.whatsapp.api_key_reference'"),
+    (("company_data_payload", "ai_config", "openai_config", "whatsapp", "assistant_id_template_sender"), "Missing 'company_data_payload.ai_config.openai_config.whatsapp.assistant_id_template_sender'"),
+    (("conversation_data", "conversation_id"), "Missing 'conversation_data.conversation_id'"),
+])
+def test_validate_context_missing_nested_keys(valid_context_template, path_keys, expected_error):
+    """Test validation fails for each missing required nested key."""
+    context = copy.deepcopy(valid_context_template)
+    # Drill down and delete the key
+    temp = context
+    for key in path_keys[:-1]:
+        temp = temp[key]
+    del temp[path_keys[-1]]
 
-    for path_keys, expected_error in required_paths_and_errors.items():
-        context = create_valid_context()
-        # Drill down and delete the key
-        temp = context
-        for i, key in enumerate(path_keys):
-            if i == len(path_keys) - 1:
-                if key in temp:
-                    del temp[key]
-            elif key in temp:
-                temp = temp[key]
-            else:
-                # Parent key missing, this case is covered elsewhere, skip
-                break
-        else: # Only run validation if the loop completed without break
-            errors = validate_context(context)
-            assert any(expected_error in e for e in errors), f"Expected error '{expected_error}' not found for missing path {path_keys}"
+    errors = validate_context(context)
+    assert any(expected_error in e for e in errors), f"Expected error '{expected_error}' not found for missing path {path_keys}"
 
 def test_validate_context_incorrect_channel_method():
     """Test validation fails if channel_method is not 'whatsapp'."""
@@ -1,61 +1,108 @@
 import pytest
-import time
 import threading
-from unittest.mock import patch, MagicMock, ANY
+from unittest.mock import patch, Mock, ANY, DEFAULT, call
 from botocore.exceptions import ClientError
 import logging
 
 # Update the import path to reflect the new code structure
 from src_dev.channel_processor.whatsapp.app.lambda_pkg.utils import sqs_heartbeat
-# Reload the module to ensure mocks are applied correctly if tests run multiple times
-from importlib import reload
-reload(sqs_heartbeat)
 SQSHeartbeat = sqs_heartbeat.SQSHeartbeat
 
+# Sub-second tick so thread-driven tests don't wait whole seconds; coverage is unchanged because
+# the loop still self-schedules via _stop_event.wait(interval_sec)
+TEST_INTERVAL_SEC = 0.05
+
 
 # --- Test Fixtures ---
 
-@pytest.fixture(autouse=True)
-def mock_boto3_client():
-    """Auto-used fixture to mock boto3.client('sqs')."""
-    mock_sqs_instance = MagicMock()
-    mock_sqs_instance.change_message_visibility.return_value = {} # Default success
+@pytest.fixture(scope="module")
+def _sqs_patch():
+    """Patches boto3.client('sqs') once for the module and yields the SQS client instance mock."""
+    # Spec'd Mock: the heartbeat only ever calls change_message_visibility
+    mock_sqs_instance = Mock(spec=["change_message_visibility"])
 
     # Patch boto3.client specifically within the sqs_heartbeat module using the correct path
-    with patch('src_dev.channel_processor.whatsapp.app.lambda_pkg.utils.sqs_heartbeat.boto3.client') as mock_client_constructor:
-        # Configure the constructor to return our specific SQS client mock instance
-        mock_client_constructor.return_value = mock_sqs_instance
-        # Yield the *instance* mock for tests to configure/assert against
-        yield mock_sqs_instance
+    patcher = patch('src_dev.channel_processor.whatsapp.app.lambda_pkg.utils.sqs_heartbeat.boto3.client')
+    mock_client_constructor = patcher.start()
+    # Configure the constructor to return our specific SQS client mock instance
+    mock_client_constructor.return_value = mock_sqs_instance
+    yield mock_sqs_instance
+    patcher.stop()
+
+@pytest.fixture(autouse=True)
+def mock_boto3_client(_sqs_patch):
+    """Auto-used fixture resetting the shared SQS client mock before each test."""
+    _sqs_patch.reset_mock(return_value=True, side_effect=True)
+    _sqs_patch.change_message_visibility.return_value = {} # Default success
+    # Yield the *instance* mock for tests to configure/assert against
+    yield _sqs_patch
 
 @pytest.fixture
 def heartbeat(mock_boto3_client): # Ensure mock is activated before heartbeat init
     """Provides a fresh SQSHeartbeat instance for each test."""
-    # Reload the module to pick up the patched boto3 client if necessary,
-    # although patching the specific import is usually sufficient.
-    reload(sqs_heartbeat)
+    # No module reload needed: the patch replaces boto3.client on the already-imported module
     # Provide necessary arguments
-    return sqs_heartbeat.SQSHeartbeat(
+    hb = sqs_heartbeat.SQSHeartbeat(
         queue_url="https://sqs.us-east-1.amazonaws.com/123456789012/test-queue",
         receipt_handle="test-receipt-handle-long-string",
-        interval_sec=1 # Short interval for testing
+        interval_sec=TEST_INTERVAL_SEC # Short interval for testing
     )
+    yield hb
+    # The SQS client mock is shared across the module, so don't leave a thread calling it.
+    # Signal and join directly with a short bound; the thread is parked in _stop_event.wait,
+    # which returns as soon as the event is set.
+    if hb._thread is not None:
+        hb._stop_event.set()
+        hb._thread.join(timeout=0.2)
+
+# --- Helpers ---
+
+def wait_for_calls(mock_sqs, n, timeout=5):
+    """Blocks until change_message_visibility has been called at least n times (or timeout).
+
+    Wraps the mock's current side_effect so the background thread signals an Event on each call,
+    instead of the test sleeping for a fixed multiple of the heartbeat interval.
+    Returns True if the calls happened within the timeout.
+    """
+    evt = threading.Event()
+    method = mock_sqs.change_message_visibility
+    original = method.side_effect
+
+    def signalling_side_effect(*args, **kwargs):
+        if method.call_count >= n:
+            evt.set()
+        if isinstance(original, BaseException) or (isinstance(original, type) and issubclass(original, BaseException)):
+            raise original
+        if callable(original):
+            return original(*args, **kwargs)
+        return DEFAULT
+
+    method.side_effect = signalling_side_effect
+    if method.call_count >= n: # Calls made before the wrapper was installed
+        evt.set()
+    return evt.wait(timeout)
+
+def wait_for_thread_exit(heartbeat, timeout=5):
+    """Joins the heartbeat thread once it has stopped itself (e.g. after an error)."""
+    thread = heartbeat._thread
+    if thread is not None:
+        thread.join(timeout)
 
 # --- Test Cases ---
 
-def test_init_success(heartbeat):
+def test_init_success(heartbeat, mock_boto3_client):
     """Test successful initialization with valid parameters."""
     assert heartbeat.queue_url == "https://sqs.us-east-1.amazonaws.com/123456789012/test-queue"
     assert heartbeat.receipt_handle == "test-receipt-handle-long-string"
-    assert heartbeat.interval_sec == 1
+    assert heartbeat.interval_sec == TEST_INTERVAL_SEC
     assert heartbeat.visibility_timeout_sec == 600 # Default visibility extension (Updated expected value)
     assert not heartbeat.running
     assert heartbeat._thread is None
     assert heartbeat._stop_event is not None
     assert not heartbeat._stop_event.is_set()
     assert heartbeat._error is None
-    # Check if _sqs_client was set (it should be if mock_boto3_client worked)
-    assert heartbeat._sqs_client is not None
+    # Check _sqs_client came from the patched boto3.client
+    assert heartbeat._sqs_client is mock_boto3_client
 
 def test_init_invalid_params():
     """Test initialization raises ValueError for invalid parameters."""
@@ -94,10 +141,10 @@ def test_start_success(heartbeat, mock_boto3_client):
     assert not heartbeat._stop_event.is_set()
     assert heartbeat.check_for_errors() is None
 
-    # Allow some time for the thread to run and make a call
-    time.sleep(heartbeat.interval_sec * 1.5)
-    # Assert against the *instance* mock
-    mock_sqs_instance.change_message_visibility.assert_called_once_with(
+    # Wait for the thread to make its first call
+    assert wait_for_calls(mock_sqs_instance, 1)
+    # Assert against the *instance* mock (the thread may tick again quickly, so check the first call)
+    assert mock_sqs_instance.change_message_visibility.call_args_list[0] == call(
         QueueUrl=heartbeat.queue_url,
         ReceiptHandle=heartbeat.receipt_handle,
         VisibilityTimeout=heartbeat.visibility_timeout_sec
@@ -120,7 +167,7 @@ def test_stop_success(heartbeat, mock_boto3_client):
     thread_before_stop = heartbeat._thread
 
     # Let it run once
-    time.sleep(heartbeat.interval_sec * 1.5)
+    assert wait_for_calls(mock_sqs_instance, 1)
     # Assert against the *instance* mock
     assert mock_sqs_instance.change_message_visibility.call_count >= 1
 
@@ -146,8 +193,8 @@ def test_heartbeat_runs_periodically(heartbeat, mock_boto3_client):
     mock_sqs_instance = mock_boto3_client # Fixture now yields the instance
     heartbeat.start()
 
-    # Wait for slightly longer than 2 intervals
-    time.sleep(heartbeat.interval_sec * 2.5)
+    # Wait for at least 2 intervals' worth of calls
+    assert wait_for_calls(mock_sqs_instance, 2)
     heartbeat.stop()
 
     # Assert against the *instance* mock
@@ -158,12 +205,19 @@ def test_heartbeat_stops_on_client_error(heartbeat, mock_boto3_client, caplog):
     mock_sqs_instance = mock_boto3_client # Fixture now yields the instance
     error_response = {'Error': {'Code': 'ReceiptHandleIsInvalid', 'Message': 'Test error'}}
     client_error = ClientError(error_response, 'ChangeMessageVisibility')
+    raised = threading.Event()
+
+    def raise_and_signal(**kwargs):
+        raised.set()
+        raise client_error
+
     # Set side effect on the *instance* mock
-    mock_sqs_instance.change_message_visibility.side_effect = client_error
+    mock_sqs_instance.change_message_visibility.side_effect = raise_and_signal
 
     heartbeat.start()
-    # Wait for the error to occur and thread to stop
-    time.sleep(heartbeat.interval_sec * 1.5)
+    # Unblock as soon as the error is raised, then let the thread finish stopping itself
+    assert raised.wait(2)
+    wait_for_thread_exit(heartbeat)
 
     assert not heartbeat.running # Thread should stop itself
     assert heartbeat.check_for_errors() is client_error
@@ -174,12 +228,19 @@ def test_heartbeat_stops_on_unexpected_error(heartbeat, mock_boto3_client, caplo
     """Test heartbeat thread stops and logs error on unexpected Exception."""
     mock_sqs_instance = mock_boto3_client # Fixture now yields the instance
     unexpected_error = ValueError("Something else broke")
+    raised = threading.Event()
+
+    def raise_and_signal(**kwargs):
+        raised.set()
+        raise unexpected_error
+
     # Set side effect on the *instance* mock
-    mock_sqs_instance.change_message_visibility.side_effect = unexpected_error
+    mock_sqs_instance.change_message_visibility.side_effect = raise_and_signal
 
     heartbeat.start()
-    # Wait for the error to occur and thread to stop
-    time.sleep(heartbeat.interval_sec * 1.5)
+    # Unblock as soon as the error is raised, then let the thread finish stopping itself
+    assert raised.wait(2)
+    wait_for_thread_exit(heartbeat)
 
     assert not heartbeat.running # Thread should stop itself
     assert heartbeat.check_for_errors() is unexpected_error
@@ -194,7 +255,7 @@ def test_check_for_errors(heartbeat, mock_boto3_client):
 
     # Scenario 1: No error
     heartbeat.start()
-    time.sleep(heartbeat.interval_sec * 0.5) # Let it run briefly
+    assert wait_for_calls(mock_sqs_instance, 1) # Let it run briefly
     assert heartbeat.check_for_errors() is None
     heartbeat.stop()
 
@@ -203,7 +264,8 @@ def test_check_for_errors(heartbeat, mock_boto3_client):
     mock_sqs_instance.change_message_visibility.side_effect = client_error
     mock_sqs_instance.change_message_visibility.reset_mock() # Reset call count if needed
     heartbeat.start()
-    time.sleep(heartbeat.interval_sec * 1.5) # Wait for error
+    assert wait_for_calls(mock_sqs_instance, 1) # Wait for error
+    wait_for_thread_exit(heartbeat)
     assert heartbeat.check_for_errors() is client_error
 
 def test_running_property(heartbeat):
@@ -211,5 +273,8 @@ def test_running_property(heartbeat):
     assert not heartbeat.running
     heartbeat.start()
     assert heartbeat.running
+    thread = heartbeat._thread # stop() clears _thread, so keep a handle to confirm it exited
     heartbeat.stop()
+    thread.join(timeout=1)
+    assert not thread.is_alive()
     assert not heartbeat.running 
\ No newline at end of file
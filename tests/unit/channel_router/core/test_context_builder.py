@@ -1,5 +1,6 @@
 # tests/unit/channel_router/core/test_context_builder.py
 
+import copy
 import pytest
 import uuid
 from datetime import datetime, timezone
@@ -13,9 +14,9 @@ from src_dev.channel_router.app.lambda_pkg.core.context_builder import (
 
 # --- Test Data Fixtures ---
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_frontend_payload():
-    """Provides a sample frontend payload dictionary."""
+    """Provides a sample frontend payload dictionary (shared; use `frontend` to mutate)."""
     return {
         "company_data": {
             "company_id": "comp-123",
@@ -34,9 +35,9 @@ def sample_frontend_payload():
         "project_data": {"key": "value"}
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_company_data():
-    """Provides a sample company data dictionary."""
+    """Provides a sample company data dictionary (shared; use `company` to mutate)."""
     return {
         "company_id": "comp-123", # Match payload
         "project_id": "proj-abc", # Match payload
@@ -62,6 +63,16 @@ def sample_company_data():
         # Add other fields as needed to reflect actual structure
     }
 
+@pytest.fixture
+def frontend(sample_frontend_payload):
+    """Per-test copy of the frontend payload for tests that mutate it."""
+    return copy.deepcopy(sample_frontend_payload)
+
+@pytest.fixture
+def company(sample_company_data):
+    """Per-test copy of the company data for tests that mutate it."""
+    return copy.deepcopy(sample_company_data)
+
 @pytest.fixture
 def sample_router_version():
     """Provides a sample router version string."""
@@ -69,66 +80,31 @@ def sample_router_version():
 
 # --- Test Cases for create_conversation_id ---
 
-def test_create_conversation_id_whatsapp(sample_frontend_payload, sample_company_data):
-    """Test conversation ID creation for WhatsApp."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    frontend["request_data"]["channel_method"] = "whatsapp"
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#447999888777"
-    conv_id = create_conversation_id(frontend, company)
-    assert conv_id == expected_id
-
-def test_create_conversation_id_sms(sample_frontend_payload, sample_company_data):
-    """Test conversation ID creation for SMS."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    frontend["request_data"]["channel_method"] = "sms"
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#15551234567"
-    conv_id = create_conversation_id(frontend, company)
-    assert conv_id == expected_id
-
-def test_create_conversation_id_email(sample_frontend_payload, sample_company_data):
-    """Test conversation ID creation for Email."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    frontend["request_data"]["channel_method"] = "email"
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#company@example.org"
-    conv_id = create_conversation_id(frontend, company)
-    assert conv_id == expected_id
-
-def test_create_conversation_id_missing_channel_config(sample_frontend_payload, sample_company_data):
-    """Test conversation ID uses placeholder if channel config is missing."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    frontend["request_data"]["channel_method"] = "whatsapp"
-    del company["channel_config"]["whatsapp"] # Remove whatsapp config
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#unknown_whatsapp_number"
-    conv_id = create_conversation_id(frontend, company)
-    assert conv_id == expected_id
-
-def test_create_conversation_id_missing_specific_contact(sample_frontend_payload, sample_company_data):
-    """Test conversation ID uses placeholder if specific number/email is missing."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    frontend["request_data"]["channel_method"] = "email"
-    del company["channel_config"]["email"]["company_email"] # Remove email address
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#unknown_company_email"
-    conv_id = create_conversation_id(frontend, company)
-    assert conv_id == expected_id
-
-def test_create_conversation_id_unknown_channel(sample_frontend_payload, sample_company_data):
-    """Test conversation ID uses channel name for unknown channels."""
-    frontend = sample_frontend_payload
-    company = sample_company_data
-    unknown_channel = "telegram"
-    frontend["request_data"]["channel_method"] = unknown_channel
-
-    expected_id = f"comp-123#proj-abc#{frontend['request_data']['request_id']}#{unknown_channel}"
+def _remove_whatsapp_config(company):
+    del company["channel_config"]["whatsapp"]
+
+def _remove_company_email(company):
+    del company["channel_config"]["email"]["company_email"]
+
+@pytest.mark.parametrize("channel, mutate, expected_suffix", [
+    ("whatsapp", None, "447999888777"),
+    ("sms", None, "15551234567"),
+    ("email", None, "company@example.org"),
+    # Placeholder if channel config is missing
+    ("whatsapp", _remove_whatsapp_config, "unknown_whatsapp_number"),
+    # Placeholder if specific number/email is missing
+    ("email", _remove_company_email, "unknown_company_email"),
+    # Channel name is used for unknown channels
+    ("telegram", None, "telegram"),
+], ids=["whatsapp", "sms", "email", "missing_channel_config", "missing_specific_contact", "unknown_channel"])
+def test_create_conversation_id(frontend, company, channel, mutate, expected_suffix):
+    """Test conversation ID creation per channel, including placeholder fallbacks."""
+    frontend["request_data"]["channel_method"] = channel
+    if mutate:
+        mutate(company)
+
+    req_id = frontend["request_data"]["request_id"]
+    expected_id = f"comp-123#proj-abc#{req_id}#{expected_suffix}"
     conv_id = create_conversation_id(frontend, company)
     assert conv_id == expected_id
 
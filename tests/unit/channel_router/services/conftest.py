@@ -0,0 +1,51 @@
+# tests/unit/channel_router/services/conftest.py
+
+import pytest
+import os
+import boto3
+from moto import mock_dynamodb, mock_sqs # Use specific decorators for moto 4.x
+
+# --- Shared Constants ---
+MOTO_REGION = 'eu-north-1'
+
+# --- Shared Fixtures ---
+
+@pytest.fixture(scope='session')
+def worker_suffix():
+    """Name suffix unique to this pytest-xdist worker ('master' when not distributed).
+
+    Read from the env var xdist sets in each worker so the suite still runs when
+    pytest-xdist (and its worker_id fixture) isn't installed, e.g. in CI.
+    """
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+@pytest.fixture(scope='package')
+def aws_credentials():
+    """Mocked AWS Credentials for moto, restored when the package's tests finish."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('AWS_ACCESS_KEY_ID', 'testing')
+        mp.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+        mp.setenv('AWS_SECURITY_TOKEN', 'testing')
+        mp.setenv('AWS_SESSION_TOKEN', 'testing')
+        mp.setenv('AWS_DEFAULT_REGION', MOTO_REGION)
+        yield
+
+@pytest.fixture(scope='package')
+def _moto_backend():
+    """Starts the moto DynamoDB and SQS mocks once for the router service tests.
+
+    Package scope keeps a single patched botocore stack for every module in this
+    directory; the per-module fixtures only create the table/queue they need.
+    """
+    with mock_dynamodb(), mock_sqs():
+        yield
+
+@pytest.fixture(scope='package')
+def dynamodb_resource(_moto_backend):
+    """boto3 DynamoDB resource bound to the shared moto backend, built once."""
+    return boto3.resource('dynamodb', region_name=MOTO_REGION)
+
+@pytest.fixture(scope='package')
+def sqs_client(_moto_backend):
+    """boto3 SQS client bound to the shared moto backend, built once."""
+    return boto3.client('sqs', region_name=MOTO_REGION)
@@ -2,21 +2,11 @@
 
 import pytest
 import os
-import boto3
-from moto import mock_dynamodb # Use specific decorator for moto 4.x
 from decimal import Decimal
-from unittest.mock import patch, MagicMock # Keep patch for env var test
+from unittest.mock import patch # Keep patch for env var test
 from botocore.exceptions import ClientError # Import ClientError
-from importlib import reload
-
-# Add src_dev parent directory to sys.path - REMOVED
-# Need to ensure pytest can find the src_dev module structure - REMOVED
-# module_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))))
-# if module_dir not in sys.path:
-#     sys.path.insert(0, module_dir)
 
 # Now import the module/functions to test
-# Import AFTER potentially modifying sys.path and setting env vars - REMOVED
 from src_dev.channel_router.app.lambda_pkg.services import dynamodb_service # Updated path
 # Import error constants directly if needed, using the updated path
 from src_dev.channel_router.app.lambda_pkg.services.dynamodb_service import (
@@ -33,71 +23,64 @@ TABLE_NAME = os.environ.get('COMPANY_DATA_TABLE_NAME_DEV', 'test-company-data-ta
 TEST_COMPANY_ID = 'comp-moto-1'
 TEST_PROJECT_ID = 'proj-moto-a'
 
+# ClientError raised by the fake table, built once at import
+_GET_ITEM_ERROR = ClientError({'Error': {'Code': 'SomeDynamoError', 'Message': 'Something failed'}}, 'GetItem')
+
+# (data, expected) pairs for replace_decimals, built once at import
+_REPLACE_DECIMAL_CASES = [
+    ({'a': Decimal('1.5'), 'b': Decimal('10'), 'c': 'string'},
+     {'a': 1.5, 'b': 10, 'c': 'string'}),
+    ({'list': [Decimal('1'), Decimal('2.2'), {'nested': Decimal('3.0')}], 'num': Decimal('5')},
+     {'list': [1, 2.2, {'nested': 3}], 'num': 5}),
+    # No Decimals - should remain unchanged
+    ({'int': 1, 'float': 2.5, 'str': 'hello', 'list': [1, 'a']},) * 2,
+]
+
 # --- Fixtures ---
 
-@pytest.fixture(scope='function')
-def aws_credentials(monkeypatch):
-    """Mocked AWS Credentials for moto using monkeypatch."""
-    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
-    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
-    monkeypatch.setenv('AWS_SECURITY_TOKEN', 'testing')
-    monkeypatch.setenv('AWS_SESSION_TOKEN', 'testing')
-    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-north-1') # Or your preferred region
+@pytest.fixture(scope='module')
+def _dynamodb_table(dynamodb_resource, aws_credentials, worker_suffix): # aws_credentials ensures env vars are set
+    """Creates the mock DynamoDB table once for the module on the shared moto backend."""
+    table = dynamodb_resource.create_table(
+        TableName=f'{TABLE_NAME}-{worker_suffix}', # Unique per xdist worker
+        KeySchema=[
+            {'AttributeName': 'company_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'project_id', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'company_id', 'AttributeType': 'S'},
+            {'AttributeName': 'project_id', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST' # On-demand, no capacity units to track
+    )
+    yield table
+    table.delete()
 
 @pytest.fixture(scope='function')
-def dynamodb_table(aws_credentials): # aws_credentials ensures env vars are set by monkeypatch
-    """Creates a mock DynamoDB table for testing."""
-    with mock_dynamodb():
-        # Explicitly pass dummy credentials and region
-        dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=os.environ['AWS_DEFAULT_REGION'],
-            aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
-            aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-            aws_session_token=os.environ['AWS_SESSION_TOKEN']
-        )
-        table = dynamodb.create_table(
-            TableName=TABLE_NAME,
-            KeySchema=[
-                {'AttributeName': 'company_id', 'KeyType': 'HASH'},
-                {'AttributeName': 'project_id', 'KeyType': 'RANGE'}
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'company_id', 'AttributeType': 'S'},
-                {'AttributeName': 'project_id', 'AttributeType': 'S'}
-            ],
-            ProvisionedThroughput={'ReadCapacityUnits': 1, 'WriteCapacityUnits': 1}
-        )
-        # Yield the Table object directly
-        yield table
-
-# Removed autouse fixture for setting env var and reloading
-# @pytest.fixture(autouse=True)
-# def set_env_var_and_reload_module(monkeypatch):
-#     ...
+def dynamodb_table(_dynamodb_table):
+    """Yields the shared mock table and empties it after each test."""
+    yield _dynamodb_table
+    scan = _dynamodb_table.scan(ProjectionExpression='company_id, project_id')
+    with _dynamodb_table.batch_writer() as batch:
+        for key in scan['Items']:
+            batch.delete_item(Key=key)
+
+class _BoomTable:
+    """Bare stand-in for the DynamoDB Table whose get_item always raises a ClientError."""
+    def __init__(self):
+        self.get_item_calls = 0
+
+    def get_item(self, **_):
+        self.get_item_calls += 1
+        raise _GET_ITEM_ERROR
 
 # --- Test Cases for replace_decimals ---
 
-def test_replace_decimals_simple_dict():
-    data = {'a': Decimal('1.5'), 'b': Decimal('10'), 'c': 'string'}
-    expected = {'a': 1.5, 'b': 10, 'c': 'string'}
+@pytest.mark.parametrize('data, expected', _REPLACE_DECIMAL_CASES,
+                         ids=['simple_dict', 'nested_structure', 'no_decimals'])
+def test_replace_decimals(data, expected):
     assert replace_decimals(data) == expected
 
-def test_replace_decimals_nested_structure():
-    data = {
-        'list': [Decimal('1'), Decimal('2.2'), {'nested': Decimal('3.0')}],
-        'num': Decimal('5')
-    }
-    expected = {
-        'list': [1, 2.2, {'nested': 3}],
-        'num': 5
-    }
-    assert replace_decimals(data) == expected
-
-def test_replace_decimals_no_decimals():
-    data = {'int': 1, 'float': 2.5, 'str': 'hello', 'list': [1, 'a']}
-    assert replace_decimals(data) == data # Should remain unchanged
-
 # --- Test Cases for get_company_config ---
 
 def test_get_company_config_success(dynamodb_table):
@@ -161,18 +144,15 @@ def test_get_company_config_no_table_env_var():
 # Note: Testing specific ClientErrors is harder with moto's high-level API,
 # but we trust moto handles the underlying calls. The DATABASE_ERROR path
 # for general exceptions is implicitly covered if boto3/moto fails internally.
-# To specifically test the DATABASE_ERROR return on ClientError, we can patch get_item:
+# To specifically test the DATABASE_ERROR return on ClientError, we use a stub table:
 
-def test_get_company_config_client_error(dynamodb_table):
+def test_get_company_config_client_error():
     """Test DATABASE_ERROR return on generic ClientError."""
-    # Patch the get_item method of the *mocked* table object
-    with patch.object(dynamodb_table, 'get_item') as mock_get:
-        error_response = {'Error': {'Code': 'SomeDynamoError', 'Message': 'Something failed'}}
-        mock_get.side_effect = ClientError(error_response, 'GetItem')
-
-        # Pass the table fixture
-        result = dynamodb_service.get_company_config(
-            TEST_COMPANY_ID, TEST_PROJECT_ID, ddb_table=dynamodb_table
-        )
-        assert result == DATABASE_ERROR
-        mock_get.assert_called_once() 
\ No newline at end of file
+    table = _BoomTable()
+
+    # Pass the stub table - no moto needed
+    result = dynamodb_service.get_company_config(
+        TEST_COMPANY_ID, TEST_PROJECT_ID, ddb_table=table
+    )
+    assert result == DATABASE_ERROR
+    assert table.get_item_calls == 1
@@ -1,45 +1,43 @@
 # tests/unit/channel_router/services/test_sqs_service.py
 
 import pytest
-import os
+import copy
 from unittest.mock import patch, MagicMock
-from moto import mock_sqs # Updated import for moto > 2.0
-import boto3
 import json
 from botocore.exceptions import ClientError, WaiterError
 
 # Update the import path to reflect the new code structure
 from src_dev.channel_router.app.lambda_pkg.services.sqs_service import send_message_to_queue
-from importlib import reload
 
 # --- Test Constants ---
 QUEUE_NAME = 'test-channel-queue'
-TEST_REGION = 'eu-north-1'
+
+# ClientErrors raised by the mock client, built once at import
+_SERVICE_UNAVAILABLE = ClientError({'Error': {'Code': 'ServiceUnavailable', 'Message': 'Mock client error'}}, 'SendMessage')
+_THROTTLING = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Mock client error'}}, 'SendMessage')
+_INVALID_PARAM = ClientError({'Error': {'Code': 'InvalidParameterValue', 'Message': 'Mock client error'}}, 'SendMessage')
 
 # --- Fixtures ---
 
-@pytest.fixture(scope='function')
-def aws_credentials():
-    """Mocked AWS Credentials for moto."""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-    os.environ['AWS_DEFAULT_REGION'] = TEST_REGION
+@pytest.fixture(scope='module')
+def _sqs_queue(sqs_client, aws_credentials, worker_suffix):
+    """Creates the mock SQS queue once for the module on the shared moto backend."""
+    response = sqs_client.create_queue(QueueName=f'{QUEUE_NAME}-{worker_suffix}') # Unique per xdist worker
+    queue_url = response['QueueUrl']
+    # Yield both the URL and the shared client used to create it
+    yield queue_url, sqs_client
+    sqs_client.delete_queue(QueueUrl=queue_url)
 
 @pytest.fixture(scope='function')
-def sqs_setup(aws_credentials):
-    """Creates a mock SQS queue and yields the URL and client."""
-    with mock_sqs():
-        sqs = boto3.client('sqs', region_name=TEST_REGION)
-        response = sqs.create_queue(QueueName=QUEUE_NAME)
-        queue_url = response['QueueUrl']
-        # Yield both the URL and the client used to create it
-        yield queue_url, sqs
-
-@pytest.fixture
-def sample_context_object():
-    """Provides a sample context object."""
+def sqs_setup(_sqs_queue):
+    """Yields the shared queue URL and client, purging the queue after each test."""
+    yield _sqs_queue
+    queue_url, sqs = _sqs_queue
+    sqs.purge_queue(QueueUrl=queue_url)
+
+@pytest.fixture(scope='session')
+def _sample_context_template():
+    """Provides a sample context object, built once. Treat as read-only."""
     # Based loosely on context_builder output structure
     return {
         "metadata": {"router_version": "1.0"},
@@ -52,58 +50,55 @@ def sample_context_object():
         "conversation_data": {"conversation_id": "c1#p1#r1#123", "status": "init"}
     }
 
-# --- Test Cases ---
+@pytest.fixture
+def sample_context_object(_sample_context_template):
+    """Provides a fresh copy of the sample context object for tests that mutate it."""
+    return copy.deepcopy(_sample_context_template)
 
-def test_send_message_success(sqs_setup, sample_context_object):
-    """Test sending a message successfully to the mock queue."""
-    queue_url, sqs_client = sqs_setup # Unpack fixture
-    # Pass the client into the function
-    result = send_message_to_queue(queue_url, sample_context_object, 'whatsapp', sqs_client=sqs_client)
-    assert result is True
+@pytest.fixture
+def mock_sqs_client():
+    """Plain mock SQS client for error-path tests that don't need moto."""
+    return MagicMock()
 
-    # Verify message content and attributes using the same client
+# --- Test Cases ---
+
+def _receive_one(sqs_client, queue_url):
+    """Receives the single message expected on the queue, with all attributes."""
     messages = sqs_client.receive_message(
         QueueUrl=queue_url,
         MaxNumberOfMessages=1,
         MessageAttributeNames=['All']
     )['Messages']
-
     assert len(messages) == 1
-    message = messages[0]
+    return messages[0]
+
+@pytest.mark.parametrize('channel, attr_key, recipient_key, absent_key', [
+    ('whatsapp', 'recipientTel', 'recipient_tel', 'recipientEmail'),
+    ('email', 'recipientEmail', 'recipient_email', 'recipientTel'),
+], ids=['whatsapp', 'email'])
+def test_send_message_attributes(sqs_setup, sample_context_object, channel, attr_key, recipient_key, absent_key):
+    """Test sending a message to the mock queue sets the body and channel-specific attributes."""
+    queue_url, sqs_client = sqs_setup # Unpack fixture
+    sample_context_object['frontend_payload']['request_data']['channel_method'] = channel # Correctly simulate channel
+    # Pass the client into the function
+    result = send_message_to_queue(queue_url, sample_context_object, channel, sqs_client=sqs_client)
+    assert result is True
+
+    # Verify message content and attributes using the same client
+    message = _receive_one(sqs_client, queue_url)
     assert json.loads(message['Body']) == sample_context_object
 
     attributes = message['MessageAttributes']
-    assert attributes['channelMethod']['StringValue'] == 'whatsapp'
+    assert attributes['channelMethod']['StringValue'] == channel
     assert attributes['conversationId']['StringValue'] == sample_context_object['conversation_data']['conversation_id']
     assert 'routerTimestamp' in attributes
-    assert attributes['recipientTel']['StringValue'] == sample_context_object['frontend_payload']['recipient_data']['recipient_tel']
-    assert 'recipientEmail' not in attributes # Should only add for email channel
-
-def test_send_message_email_channel_attributes(sqs_setup, sample_context_object):
-    """Test message attributes are correct for the email channel."""
-    queue_url, sqs_client = sqs_setup # Unpack fixture
-    sample_context_object['frontend_payload']['request_data']['channel_method'] = 'email' # Correctly simulate channel
-    # Pass the client
-    result = send_message_to_queue(queue_url, sample_context_object, 'email', sqs_client=sqs_client)
-    assert result is True
+    assert attributes[attr_key]['StringValue'] == sample_context_object['frontend_payload']['recipient_data'][recipient_key]
+    assert absent_key not in attributes # Only the channel's own recipient attribute is added
 
-    # Verify message attributes using the same client
-    messages = sqs_client.receive_message(
-        QueueUrl=queue_url,
-        MaxNumberOfMessages=1,
-        MessageAttributeNames=['All']
-    )['Messages']
-
-    assert len(messages) == 1
-    attributes = messages[0]['MessageAttributes']
-    assert attributes['channelMethod']['StringValue'] == 'email'
-    assert attributes['recipientEmail']['StringValue'] == sample_context_object['frontend_payload']['recipient_data']['recipient_email']
-    assert 'recipientTel' not in attributes
-
-def test_send_message_no_queue_url(sample_context_object):
+def test_send_message_no_queue_url(_sample_context_template):
     """Test behavior when queue_url is empty."""
     # Client doesn't matter here, it returns early
-    result = send_message_to_queue("", sample_context_object, 'whatsapp')
+    result = send_message_to_queue("", _sample_context_template, 'whatsapp')
     assert result is False
 
 def test_send_message_serialization_error():
@@ -113,58 +108,28 @@ def test_send_message_serialization_error():
     result = send_message_to_queue("dummy_url", invalid_context, 'whatsapp')
     assert result is False
 
-@patch('time.sleep', return_value=None) # Mock time.sleep to speed up retry tests
-def test_send_message_retry_logic(mock_sleep, sample_context_object):
-    """Test that ClientErrors like ServiceUnavailable are NOT retried by the application."""
+@pytest.mark.parametrize('client_error', [_SERVICE_UNAVAILABLE, _THROTTLING, _INVALID_PARAM],
+                         ids=['ServiceUnavailable', 'ThrottlingException', 'InvalidParameterValue'])
+@patch('time.sleep', return_value=None) # Guard against a real sleep if a retry ever happens
+def test_send_message_client_error_not_retried(mock_sleep, _sample_context_template, mock_sqs_client, client_error):
+    """Test that ClientErrors (transient or not) are NOT retried by the application."""
     queue_url = "mock_queue_url"
-    error_response = {'Error': {'Code': 'ServiceUnavailable', 'Message': 'Mock service error'}}
-    # Create a mock client for this test
-    mock_sqs_client = MagicMock()
-    mock_sqs_client.send_message.side_effect = ClientError(error_response, 'SendMessage')
-
-    # Pass the mock client directly
-    result = send_message_to_queue(queue_url, sample_context_object, 'whatsapp', sqs_client=mock_sqs_client)
-
-    assert result is False # Should fail immediately now
-    assert mock_sqs_client.send_message.call_count == 1 # Should not retry ClientError
-    assert mock_sleep.call_count == 0 # Should not sleep
-
-@patch('time.sleep', return_value=None)
-def test_send_message_retry_fails_permanently(mock_sleep, sample_context_object):
-    """Test when retries are exhausted for a transient error."""
-    queue_url = "mock_queue_url"
-    error_response = {'Error': {'Code': 'ThrottlingException', 'Message': 'Mock throttle error'}}
-    mock_sqs_client = MagicMock()
-    mock_sqs_client.send_message.side_effect = ClientError(error_response, 'SendMessage')
+    mock_sqs_client.send_message.side_effect = client_error
 
     # Pass the mock client
-    result = send_message_to_queue(queue_url, sample_context_object, 'whatsapp', sqs_client=mock_sqs_client)
+    result = send_message_to_queue(queue_url, _sample_context_template, 'whatsapp', sqs_client=mock_sqs_client)
 
     assert result is False # Should fail immediately
     assert mock_sqs_client.send_message.call_count == 1 # Should not retry ClientError
     assert mock_sleep.call_count == 0 # Should not sleep
 
-def test_send_message_non_retryable_client_error(sample_context_object):
-    """Test a non-transient ClientError (e.g., InvalidParameterValue) is not retried."""
-    queue_url = "mock_queue_url"
-    error_response = {'Error': {'Code': 'InvalidParameterValue', 'Message': 'Mock param error'}}
-    mock_sqs_client = MagicMock()
-    mock_sqs_client.send_message.side_effect = ClientError(error_response, 'SendMessage')
-
-    # Pass the mock client
-    result = send_message_to_queue(queue_url, sample_context_object, 'whatsapp', sqs_client=mock_sqs_client)
-
-    assert result is False # Should fail immediately
-    assert mock_sqs_client.send_message.call_count == 1 # Should not retry
-
-def test_send_message_unexpected_error(sample_context_object):
+def test_send_message_unexpected_error(_sample_context_template, mock_sqs_client):
     """Test handling of unexpected non-ClientError exceptions."""
     queue_url = "mock_queue_url"
-    mock_sqs_client = MagicMock()
     mock_sqs_client.send_message.side_effect = ValueError("Something totally unexpected")
 
     # Pass the mock client
-    result = send_message_to_queue(queue_url, sample_context_object, 'whatsapp', sqs_client=mock_sqs_client)
+    result = send_message_to_queue(queue_url, _sample_context_template, 'whatsapp', sqs_client=mock_sqs_client)
 
     assert result is False # Should fail immediately
     assert mock_sqs_client.send_message.call_count == 1 # Should not retry 
\ No newline at end of file
@@ -1,106 +1,205 @@
 # tests/unit/channel_router/test_index.py
 
 import pytest
-from unittest.mock import patch, MagicMock, ANY
+from unittest.mock import MagicMock, create_autospec
 import json
-import os
+import copy
+from types import SimpleNamespace, MappingProxyType
 import uuid # Import uuid for mock fixture
+import logging
 
 # --- Path Setup Removed --- # Handled by pytest.ini
 
 # Import the handler function directly
 from src_dev.channel_router.app.lambda_pkg.index import lambda_handler
 
-# Import specific error codes for assertions (if needed)
-# Note: These might not be needed if we mock the db_service correctly
-from src_dev.channel_router.app.lambda_pkg.services import dynamodb_service
+# Real dependency modules, used as autospec templates for the injected mocks
+from src_dev.channel_router.app.lambda_pkg.utils import request_parser, validators, response_builder
+from src_dev.channel_router.app.lambda_pkg.services import sqs_service
+from src_dev.channel_router.app.lambda_pkg.core import context_builder
+
+# Keep this module on one xdist worker under --dist loadgroup so its module/session
+# scoped fixtures are built once rather than once per worker, and fail on any warning
+# (e.g. an autospec/deprecation warning) since every dependency here is mocked.
+pytestmark = [
+    pytest.mark.xdist_group("channel_router_unit"),
+    pytest.mark.filterwarnings("error"),
+]
+
+# --- Test Constants ---
+
+# Default response bodies returned by the mocked response builder, serialized once
+_DEFAULT_OK_BODY = json.dumps({'message': 'Success', 'request_id': 'mock_req_id'})
+_DEFAULT_ERR_BODY = json.dumps({'error': {'code': 'MOCK_ERROR', 'message': 'Mock error response'}})
+
+# Environment Variables read by the handler
+ROUTER_ENV_VARS = {
+    'COMPANY_DATA_TABLE': 'mock-company-table',
+    'WHATSAPP_QUEUE_URL': 'mock_whatsapp_url',
+    'EMAIL_QUEUE_URL': 'mock_email_url',
+    'SMS_QUEUE_URL': 'mock_sms_url',
+    'VERSION': 'test-router-1.0',
+    'LOG_LEVEL': 'INFO'
+}
+
+# Error tuples returned by dynamodb_service.get_company_config (kept in sync by
+# test_dynamodb_error_constants_match_service)
+COMPANY_NOT_FOUND = ("COMPANY_NOT_FOUND", "Company and project combination not found")
+PROJECT_INACTIVE = ("PROJECT_INACTIVE", "Project is not active")
+
+FIXED_UUID = uuid.UUID('11111111-1111-1111-1111-111111111111')
+
+# Test data templates, built once at import. MappingProxyType only guards the top
+# level, so always go through mutable_copy() before changing anything.
+_APIGW_EVENT = MappingProxyType({ 'httpMethod': 'POST', 'path': '/initiate-conversation', 'headers': {'Content-Type': 'application/json'}, 'body': '{"data": "mocked_out"}', 'isBase64Encoded': False, 'requestContext': {'requestId': 'apigw-req-id'} })
+_BASE_PAYLOAD = MappingProxyType({ 'company_data': {'company_id': 'c1', 'project_id': 'p1'}, 'recipient_data': {}, 'request_data': {'channel_method': 'whatsapp', 'request_id': 'req1'} })
+_BASE_CONFIG = MappingProxyType({'allowed_channels': ['whatsapp', 'email', 'sms'], 'project_status': 'active'})
+
+def mutable_copy(template):
+    """Returns a deep, mutable dict copy of a MappingProxyType template."""
+    return copy.deepcopy(dict(template))
 
 # --- Test Fixtures ---
 
-# Environment Variable Fixture (using patch.dict)
 @pytest.fixture(scope="function", autouse=True)
-def set_router_environment_variables():
-    """Sets required environment variables using patch.dict."""
-    env_vars = {
-        'COMPANY_DATA_TABLE': 'mock-company-table',
-        'WHATSAPP_QUEUE_URL': 'mock_whatsapp_url',
-        'EMAIL_QUEUE_URL': 'mock_email_url',
-        'SMS_QUEUE_URL': 'mock_sms_url',
-        'VERSION': 'test-router-1.0',
-        'LOG_LEVEL': 'INFO'
-    }
-    with patch.dict(os.environ, env_vars, clear=True) as patched_env:
-        yield patched_env
+def set_router_environment_variables(monkeypatch):
+    """Sets required environment variables using monkeypatch (restored after each test)."""
+    for key, value in ROUTER_ENV_VARS.items():
+        monkeypatch.setenv(key, value)
 
 # Individual Mock Fixtures for Dependencies
+# Each mock is autospecced from the real module once per session (catching signature
+# drift), then reset and given its defaults again at the start of every test.
+def _reset(mock):
+    mock.reset_mock(return_value=True, side_effect=True)
+    return mock
+
+@pytest.fixture(scope="session")
+def _req_parser_spec():
+    return create_autospec(request_parser, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _req_validator_spec():
+    return create_autospec(validators, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _db_service_spec():
+    from src_dev.channel_router.app.lambda_pkg.services import dynamodb_service
+    return create_autospec(dynamodb_service, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _queue_service_spec():
+    return create_autospec(sqs_service, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _ctx_builder_spec():
+    return create_autospec(context_builder, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _resp_builder_spec():
+    return create_autospec(response_builder, spec_set=True)
+
+@pytest.fixture(scope="session")
+def _logger_spec():
+    return create_autospec(logging.Logger, spec_set=True, instance=True)
+
 @pytest.fixture
-def mock_req_parser():
-    return MagicMock()
+def mock_req_parser(_req_parser_spec):
+    return _reset(_req_parser_spec)
 
 @pytest.fixture
-def mock_req_validator():
-    mock = MagicMock()
+def mock_req_validator(_req_validator_spec):
+    mock = _reset(_req_validator_spec)
     mock.validate_initiate_request.return_value = None # Default: validation passes
     return mock
 
 @pytest.fixture
-def mock_db_service():
-    mock = MagicMock()
+def mock_db_service(_db_service_spec):
+    mock = _reset(_db_service_spec)
     # Define specific error constants on the mock if tests rely on them
-    mock.COMPANY_NOT_FOUND = dynamodb_service.COMPANY_NOT_FOUND
-    mock.PROJECT_INACTIVE = dynamodb_service.PROJECT_INACTIVE
+    mock.COMPANY_NOT_FOUND = COMPANY_NOT_FOUND
+    mock.PROJECT_INACTIVE = PROJECT_INACTIVE
     return mock
 
 @pytest.fixture
-def mock_queue_service():
-    mock = MagicMock()
+def mock_queue_service(_queue_service_spec):
+    mock = _reset(_queue_service_spec)
     mock.send_message_to_queue.return_value = True # Default: send succeeds
     return mock
 
 @pytest.fixture
-def mock_ctx_builder():
-    return MagicMock()
+def mock_ctx_builder(_ctx_builder_spec):
+    return _reset(_ctx_builder_spec)
 
 @pytest.fixture
-def mock_resp_builder():
-    mock = MagicMock()
+def mock_resp_builder(_resp_builder_spec):
+    mock = _reset(_resp_builder_spec)
     # Provide default mock returns for response functions
-    mock.create_success_response.return_value = {'statusCode': 200, 'body': json.dumps({'message': 'Success', 'request_id': 'mock_req_id'})}
-    mock.create_error_response.return_value = {'statusCode': 500, 'body': json.dumps({'error': {'code': 'MOCK_ERROR', 'message': 'Mock error response'}})}
+    mock.create_success_response.return_value = {'statusCode': 200, 'body': _DEFAULT_OK_BODY}
+    mock.create_error_response.return_value = {'statusCode': 500, 'body': _DEFAULT_ERR_BODY}
     return mock
 
 @pytest.fixture
-def mock_logger():
-    return MagicMock()
+def mock_logger(_logger_spec):
+    return _reset(_logger_spec)
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_id_generator():
+    """Fixed-UUID generator; the value never changes, so it is built once."""
     mock = MagicMock()
-    mock.uuid4.return_value = uuid.UUID('11111111-1111-1111-1111-111111111111') # Fixed mock UUID
+    mock.uuid4.return_value = FIXED_UUID # Fixed mock UUID
     return mock
 
 # Fixtures for test data
-@pytest.fixture
+# Read-only (top-level) views of the module templates; tests that mutate them must
+# take a mutable_copy() first.
+@pytest.fixture(scope="module")
 def sample_apigw_event():
     """Provides a basic API Gateway proxy event."""
-    return { 'httpMethod': 'POST', 'path': '/initiate-conversation', 'headers': {'Content-Type': 'application/json'}, 'body': '{"data": "mocked_out"}', 'isBase64Encoded': False, 'requestContext': {'requestId': 'apigw-req-id'} }
+    return _APIGW_EVENT
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def base_mock_payload():
     """Provides a payload structure often returned by the mocked parser."""
-    return { 'company_data': {'company_id': 'c1', 'project_id': 'p1'}, 'recipient_data': {}, 'request_data': {'channel_method': 'whatsapp', 'request_id': 'req1'} }
+    return _BASE_PAYLOAD
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def base_mock_config():
     """Provides a config structure often returned by the mocked db service."""
-    return {'allowed_channels': ['whatsapp', 'email', 'sms'], 'project_status': 'active'}
+    return _BASE_CONFIG
+
+@pytest.fixture
+def invoke_handler(
+    mock_req_parser, mock_req_validator, mock_db_service, mock_queue_service,
+    mock_ctx_builder, mock_resp_builder, mock_logger, mock_id_generator
+):
+    """Returns a callable that runs lambda_handler with every dependency injected as a mock."""
+    def _invoke(event):
+        return lambda_handler(
+            event, None,
+            req_parser=mock_req_parser,
+            req_validator=mock_req_validator,
+            db_service=mock_db_service,
+            queue_service=mock_queue_service,
+            ctx_builder=mock_ctx_builder,
+            resp_builder=mock_resp_builder,
+            log=mock_logger,
+            id_generator=mock_id_generator # Ensure fixed ID is used
+        )
+    return _invoke
 
 # --- Test Cases ---
 
+def test_dynamodb_error_constants_match_service():
+    """Smoke test that the hard-coded error tuples match the real service constants."""
+    from src_dev.channel_router.app.lambda_pkg.services import dynamodb_service
+    assert COMPANY_NOT_FOUND == dynamodb_service.COMPANY_NOT_FOUND
+    assert PROJECT_INACTIVE == dynamodb_service.PROJECT_INACTIVE
+
 def test_lambda_handler_success_path(
-    mock_req_parser, mock_req_validator, mock_db_service,
-    mock_queue_service, mock_ctx_builder, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload, base_mock_config
+    invoke_handler, mock_req_parser, mock_req_validator, mock_db_service, mock_queue_service,
+    mock_ctx_builder, mock_resp_builder, mock_logger, sample_apigw_event, base_mock_payload,
+    base_mock_config
 ):
     """Test the main handler's successful execution path."""
     mock_context = {'built': 'context'}
@@ -113,17 +212,7 @@ def test_lambda_handler_success_path(
     mock_resp_builder.create_success_response.return_value = mock_success_resp
 
     # Call the handler with injected mocks
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        queue_service=mock_queue_service,
-        ctx_builder=mock_ctx_builder,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-        # id_generator will use default mock if not specified
-    )
+    result = invoke_handler(sample_apigw_event)
 
     assert result == mock_success_resp
     mock_req_parser.parse_request_body.assert_called_once_with(sample_apigw_event)
@@ -136,213 +225,34 @@ def test_lambda_handler_success_path(
     mock_logger.error.assert_not_called()
     mock_logger.warning.assert_not_called()
 
-def test_handler_parse_fails(
-    mock_req_parser, mock_resp_builder, mock_req_validator, mock_logger, mock_id_generator,
-    sample_apigw_event
-):
-    """Test handler returns error when parse_request_body returns None."""
-    mock_req_parser.parse_request_body.return_value = None
-    expected_error_resp = {'statusCode': 400, 'body': 'Parse Error Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-    fixed_request_id = str(mock_id_generator.uuid4()) # Get the fixed UUID
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        resp_builder=mock_resp_builder,
-        log=mock_logger,
-        id_generator=mock_id_generator # Ensure fixed ID is used
-    )
-
-    assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code='INVALID_REQUEST',
-        error_message='Invalid or missing request body',
-        request_id=fixed_request_id, # Assert the fixed UUID was used
-        status_code_hint=400
-    )
-    mock_req_validator.validate_initiate_request.assert_not_called()
-
-def test_handler_validation_fails(
-    mock_req_parser, mock_req_validator, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload
-):
-    """Test handler returns error when validate_initiate_request fails."""
-    mock_error = ("TEST_VALIDATION_CODE", "Test validation message")
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_req_validator.validate_initiate_request.return_value = mock_error
-    expected_error_resp = {'statusCode': 400, 'body': 'Validation Error Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
-
-    assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code=mock_error[0],
-        error_message=mock_error[1],
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=400
-    )
-
-def test_handler_db_config_not_found(
-    mock_req_parser, mock_req_validator, mock_db_service, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload
-):
-    """Test handler returns error when get_company_config returns COMPANY_NOT_FOUND."""
-    mock_error = mock_db_service.COMPANY_NOT_FOUND # Use error from mock
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_db_service.get_company_config.return_value = mock_error
-    expected_error_resp = {'statusCode': 404, 'body': 'Not Found Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
-
-    assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code=mock_error[0],
-        error_message=mock_error[1],
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=404
-    )
-
-def test_handler_db_project_inactive(
-    mock_req_parser, mock_req_validator, mock_db_service, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload
-):
-    """Test handler returns error when get_company_config returns PROJECT_INACTIVE."""
-    mock_error = mock_db_service.PROJECT_INACTIVE # Use error from mock
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_db_service.get_company_config.return_value = mock_error
-    expected_error_resp = {'statusCode': 403, 'body': 'Inactive Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
-
-    assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code=mock_error[0],
-        error_message=mock_error[1],
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=403
-    )
-
-def test_handler_channel_not_allowed(
-    mock_req_parser, mock_req_validator, mock_db_service, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload, base_mock_config
-):
-    """Test handler returns error when channel_method is not in allowed_channels."""
-    base_mock_payload['request_data']['channel_method'] = 'email' # Request email
-    base_mock_config['allowed_channels'] = ['whatsapp', 'sms'] # But only allow others
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_db_service.get_company_config.return_value = base_mock_config
-    expected_error_resp = {'statusCode': 403, 'body': 'Channel Not Allowed Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
-
-    assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code='CHANNEL_NOT_ALLOWED',
-        error_message=ANY, # Message contains the channel name
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=403
-    )
-
-def test_handler_sqs_send_fails(
-    mock_req_parser, mock_req_validator, mock_db_service,
-    mock_queue_service, mock_ctx_builder, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload, base_mock_config
-):
-    """Test handler returns error when send_message_to_queue returns False."""
-    mock_context = {'built': 'context'}
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_db_service.get_company_config.return_value = base_mock_config
-    mock_ctx_builder.build_context_object.return_value = mock_context
-    mock_queue_service.send_message_to_queue.return_value = False # Simulate failure
-    expected_error_resp = {'statusCode': 500, 'body': 'SQS Error Response'}
-    mock_resp_builder.create_error_response.return_value = expected_error_resp
-
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        queue_service=mock_queue_service,
-        ctx_builder=mock_ctx_builder,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
-
-    assert result == expected_error_resp
-    mock_queue_service.send_message_to_queue.assert_called_once() # Check it was called
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code='QUEUE_ERROR',
-        error_message=ANY,
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=500
-    )
-    mock_resp_builder.create_success_response.assert_not_called()
-
-@pytest.mark.parametrize("channel, expected_url_env_var", [
+@pytest.fixture(scope="module", params=[
     ("whatsapp", "WHATSAPP_QUEUE_URL"),
     ("email", "EMAIL_QUEUE_URL"),
     ("sms", "SMS_QUEUE_URL"),
-])
+], ids=lambda case: case[0])
+def channel_case(request):
+    """(channel, expected queue URL, parser payload) per channel; the payload copy is built once per channel."""
+    channel, expected_url_env_var = request.param
+    payload = mutable_copy(_BASE_PAYLOAD)
+    payload['request_data']['channel_method'] = channel
+    return channel, ROUTER_ENV_VARS[expected_url_env_var], payload
+
 def test_handler_correct_queue_url(
-    mock_req_parser, mock_req_validator, mock_db_service,
-    mock_queue_service, mock_ctx_builder, mock_resp_builder, mock_logger,
-    sample_apigw_event, base_mock_payload, base_mock_config,
-    channel, expected_url_env_var
+    invoke_handler, mock_req_parser, mock_db_service, mock_queue_service, mock_ctx_builder,
+    mock_resp_builder, sample_apigw_event, base_mock_config, channel_case
 ):
     """Test that the correct queue URL is selected based on channel_method."""
-    base_mock_payload['request_data']['channel_method'] = channel
+    channel, expected_queue_url, payload = channel_case
     mock_context = {'built': 'context'}
     mock_success_resp = {'statusCode': 200, 'body': 'Success Response'}
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
+    mock_req_parser.parse_request_body.return_value = payload
     mock_db_service.get_company_config.return_value = base_mock_config
     mock_ctx_builder.build_context_object.return_value = mock_context
     mock_resp_builder.create_success_response.return_value = mock_success_resp
 
-    lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        queue_service=mock_queue_service,
-        ctx_builder=mock_ctx_builder,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
+    invoke_handler(sample_apigw_event)
 
     # Assert send_message_to_queue was called with the correct URL from env vars
-    expected_queue_url = os.environ.get(expected_url_env_var)
     mock_queue_service.send_message_to_queue.assert_called_once_with(
         expected_queue_url,
         mock_context,
@@ -351,33 +261,103 @@ def test_handler_correct_queue_url(
     mock_resp_builder.create_success_response.assert_called_once()
     mock_resp_builder.create_error_response.assert_not_called()
 
-def test_handler_unknown_queue_url(
-    mock_req_parser, mock_req_validator, mock_db_service, mock_resp_builder, mock_logger,
-    mock_queue_service,
-    sample_apigw_event, base_mock_payload, base_mock_config
+# --- Assertion Helpers ---
+
+class StartsWith:
+    """Equality matcher for strings beginning with a given prefix (a narrower ANY)."""
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __eq__(self, other):
+        return isinstance(other, str) and other.startswith(self.prefix)
+
+    def __repr__(self):
+        return f"StartsWith({self.prefix!r})"
+
+def assert_error(mock, code, status, *, error_message, request_id):
+    """Asserts create_error_response was called once with the given keyword arguments."""
+    assert mock.call_count == 1
+    assert not mock.call_args.args # Handler passes everything by keyword
+    kwargs = mock.call_args.kwargs
+    assert kwargs['error_code'] == code
+    assert kwargs['status_code_hint'] == status
+    assert kwargs['error_message'] == error_message
+    assert kwargs['request_id'] == request_id
+
+# --- Error Path Cases ---
+# Each setup function receives the test's mocks/data bundle and breaks one step of the
+# happy path; request_id None means the payload's request_id is expected.
+
+def _parse_fails(m):
+    m.req_parser.parse_request_body.return_value = None
+
+def _validation_fails(m):
+    m.req_validator.validate_initiate_request.return_value = ("TEST_VALIDATION_CODE", "Test validation message")
+
+def _db_config_not_found(m):
+    m.db_service.get_company_config.return_value = COMPANY_NOT_FOUND
+
+def _db_project_inactive(m):
+    m.db_service.get_company_config.return_value = PROJECT_INACTIVE
+
+def _channel_not_allowed(m):
+    m.payload['request_data']['channel_method'] = 'email' # Request email
+    m.config['allowed_channels'] = ['whatsapp', 'sms'] # But only allow others
+
+def _sqs_send_fails(m):
+    m.queue_service.send_message_to_queue.return_value = False # Simulate failure
+
+def _unknown_queue_url(m):
+    m.payload['request_data']['channel_method'] = 'fax' # Use unsupported channel
+    m.config['allowed_channels'].append('fax') # Allow it in config
+
+ERROR_CASES = [
+    pytest.param(_parse_fails, 'INVALID_REQUEST', 'Invalid or missing request body', 400,
+                 str(FIXED_UUID), 0, 0, id='parse_fails'),
+    pytest.param(_validation_fails, 'TEST_VALIDATION_CODE', 'Test validation message', 400,
+                 None, 1, 0, id='validation_fails'),
+    pytest.param(_db_config_not_found, *COMPANY_NOT_FOUND, 404,
+                 None, 1, 0, id='db_config_not_found'),
+    pytest.param(_db_project_inactive, *PROJECT_INACTIVE, 403,
+                 None, 1, 0, id='db_project_inactive'),
+    pytest.param(_channel_not_allowed, 'CHANNEL_NOT_ALLOWED', StartsWith("Channel 'email'"), 403,
+                 None, 1, 0, id='channel_not_allowed'),
+    pytest.param(_sqs_send_fails, 'QUEUE_ERROR', StartsWith('Failed to send message'), 500,
+                 None, 1, 1, id='sqs_send_fails'),
+    pytest.param(_unknown_queue_url, 'CONFIGURATION_ERROR', StartsWith("Processing queue for channel 'fax'"), 500,
+                 None, 1, 0, id='unknown_queue_url'),
+]
+
+@pytest.mark.parametrize(
+    "setup, error_code, error_message, status_code, request_id, expected_validate_calls, expected_send_calls",
+    ERROR_CASES
+)
+def test_handler_error_paths(
+    invoke_handler, mock_req_parser, mock_req_validator, mock_db_service, mock_queue_service,
+    mock_ctx_builder, mock_resp_builder, sample_apigw_event, base_mock_payload, base_mock_config,
+    setup, error_code, error_message, status_code, request_id, expected_validate_calls, expected_send_calls
 ):
-    """Test handler returns error if channel is valid but queue URL env var is missing."""
-    base_mock_payload['request_data']['channel_method'] = 'fax' # Use unsupported channel
-    base_mock_config['allowed_channels'].append('fax') # Allow it in config
-    mock_req_parser.parse_request_body.return_value = base_mock_payload
-    mock_db_service.get_company_config.return_value = base_mock_config
-    expected_error_resp = {'statusCode': 500, 'body': 'Config Error Response'}
+    """Test handler returns the expected error response when one step of the flow fails."""
+    m = SimpleNamespace(
+        req_parser=mock_req_parser, req_validator=mock_req_validator,
+        db_service=mock_db_service, queue_service=mock_queue_service,
+        payload=mutable_copy(base_mock_payload), config=mutable_copy(base_mock_config)
+    )
+    mock_req_parser.parse_request_body.return_value = m.payload
+    mock_db_service.get_company_config.return_value = m.config
+    mock_ctx_builder.build_context_object.return_value = {'built': 'context'}
+    expected_error_resp = {'statusCode': status_code, 'body': 'Error Response'}
     mock_resp_builder.create_error_response.return_value = expected_error_resp
+    setup(m)
 
-    result = lambda_handler(
-        sample_apigw_event, None,
-        req_parser=mock_req_parser,
-        req_validator=mock_req_validator,
-        db_service=mock_db_service,
-        resp_builder=mock_resp_builder,
-        log=mock_logger
-    )
+    result = invoke_handler(sample_apigw_event)
 
     assert result == expected_error_resp
-    mock_resp_builder.create_error_response.assert_called_once_with(
-        error_code='CONFIGURATION_ERROR',
-        error_message=ANY,
-        request_id=base_mock_payload['request_data']['request_id'],
-        status_code_hint=500
+    assert_error(
+        mock_resp_builder.create_error_response, error_code, status_code,
+        error_message=error_message,
+        request_id=request_id or m.payload['request_data']['request_id']
     )
-    mock_queue_service.send_message_to_queue.assert_not_called() 
\ No newline at end of file
+    assert mock_req_validator.validate_initiate_request.call_count == expected_validate_calls
+    assert mock_queue_service.send_message_to_queue.call_count == expected_send_calls
+    mock_resp_builder.create_success_response.assert_not_called()
@@ -0,0 +1,26 @@
+# tests/unit/channel_router/utils/conftest.py
+
+import json
+
+import pytest
+
+from src_dev.channel_router.app.lambda_pkg.utils import request_parser, response_builder
+
+# --- Shared Fixtures ---
+
+@pytest.fixture(params=['orjson', 'json'])
+def json_backend(request, monkeypatch):
+    """Runs a test against both JSON backends the router utils can use.
+
+    The modules pick orjson when it is installed and fall back to the stdlib json
+    module otherwise; the two differ on edge cases (NaN, integers beyond 64 bits),
+    so the parser and builder tests exercise both regardless of what is installed.
+    """
+    if request.param == 'orjson':
+        orjson = pytest.importorskip('orjson')
+        monkeypatch.setattr(request_parser, '_json_loads', orjson.loads)
+        monkeypatch.setattr(response_builder, '_dumps', lambda obj: orjson.dumps(obj).decode('utf-8'))
+    else:
+        monkeypatch.setattr(request_parser, '_json_loads', json.loads)
+        monkeypatch.setattr(response_builder, '_dumps', json.dumps)
+    return request.param
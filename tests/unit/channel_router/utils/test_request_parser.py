@@ -10,6 +10,9 @@ from unittest.mock import patch, MagicMock
 # Update the import path to reflect the new code structure
 from src_dev.channel_router.app.lambda_pkg.utils.request_parser import parse_request_body
 
+# Every test runs against both the orjson and stdlib json backends (see conftest.py)
+pytestmark = pytest.mark.usefixtures("json_backend")
+
 # --- Test Data ---
 VALID_PAYLOAD_DICT = {"key": "value", "number": 123}
 VALID_PAYLOAD_JSON = json.dumps(VALID_PAYLOAD_DICT)
@@ -61,6 +64,12 @@ def test_parse_body_invalid_base64():
     """Test parsing invalid Base64 when isBase64Encoded is True."""
     event = {"body": "this is invalid base64!@#", "isBase64Encoded": True}
     assert parse_request_body(event) is None
+    # Valid Base64 with stray non-alphabet characters is rejected, not silently cleaned
+    event_stray_chars = {"body": "!" + VALID_PAYLOAD_BASE64, "isBase64Encoded": True}
+    assert parse_request_body(event_stray_chars) is None
+    # Non-ASCII characters make b64decode raise a plain ValueError, not binascii.Error
+    event_non_ascii = {"body": "é" + VALID_PAYLOAD_BASE64, "isBase64Encoded": True}
+    assert parse_request_body(event_non_ascii) is None
 
 def test_parse_body_not_json_with_base64():
     """Test parsing valid Base64 containing non-JSON content."""
@@ -68,6 +77,11 @@ def test_parse_body_not_json_with_base64():
     event = {"body": not_json_base64, "isBase64Encoded": True}
     assert parse_request_body(event) is None
 
+def test_parse_body_json_integer_too_long():
+    """Test parsing a JSON integer longer than the int conversion limit."""
+    event = {"body": "1" * 5000, "isBase64Encoded": False}
+    assert parse_request_body(event) is None
+
 def test_parse_non_string_body():
     """Test parsing when the body is not a string."""
     event_dict = {"body": {"a": 1}, "isBase64Encoded": False}
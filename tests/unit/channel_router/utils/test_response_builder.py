@@ -10,9 +10,11 @@ from src_dev.channel_router.app.lambda_pkg.utils.response_builder import (
     create_success_response,
     create_error_response,
     COMMON_HEADERS
-    # ERROR_CODE_MAP is defined inside the function, cannot be imported
 )
 
+# Every test runs against both the orjson and stdlib json backends (see conftest.py)
+pytestmark = pytest.mark.usefixtures("json_backend")
+
 # --- Test Cases for create_success_response ---
 
 def test_create_success_response_structure():
@@ -86,6 +86,10 @@ def test_validate_missing_request_data():
     del payload["request_data"]
     assert_validation_fails(payload, "MISSING_REQUEST_DATA")
 
+@pytest.mark.parametrize("body", [[], [1, 2]], ids=["empty_array", "array"])
+def test_validate_body_not_object(body):
+    assert_validation_fails(body, "MISSING_COMPANY_DATA")
+
 # --- Tests for Invalid Section Types ---
 
 def test_validate_company_data_not_dict():
@@ -178,6 +182,17 @@ def test_validate_timestamp_invalid_iso():
     payload["request_data"]["initial_request_timestamp"] = "2024/01/01 12:00:00"
     assert_validation_fails(payload, "INVALID_TIMESTAMP")
 
+def test_validate_timestamp_non_ascii_digits():
+    payload = get_valid_payload()
+    payload["request_data"]["initial_request_timestamp"] = "\u0662\u0660\u0662\u0664-01-01T12:00:00Z" # Arabic-Indic year digits
+    assert_validation_fails(payload, "INVALID_TIMESTAMP")
+
+@pytest.mark.parametrize("timestamp", ["2024-01-01", "2024-01-01 12:00:00", "2024-01-01T12:00Z"])
+def test_validate_timestamp_other_iso_forms_accepted(timestamp):
+    payload = get_valid_payload()
+    payload["request_data"]["initial_request_timestamp"] = timestamp
+    assert validate_initiate_request(payload) is None
+
 def test_validate_recipient_tel_not_string():
     payload = get_valid_payload()
     payload["request_data"]["channel_method"] = "whatsapp"